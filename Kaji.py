@@ -1,116 +1,547 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import sqlite3
-from datetime import datetime
-
-# DB接続
-import os
+from datetime import datetime, timedelta
 
-###データが1日で消えるので以下２行削除
-#DB_PATH = os.path.join(os.getcwd(), "kaji.db")
-#conn = sqlite3.connect(DB_PATH)
-#代わりにこれを代入
-DB_PATH = "kaji.db"
-conn = sqlite3.connect(DB_PATH)
-
-cur = conn.cursor()
-cur.execute("""
-CREATE TABLE IF NOT EXISTS kaji (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    date TEXT,
-    task TEXT,
-    person TEXT,
-    time TEXT
+import kaji_metrics
+from kaji_daemon import RemoteHouseholds
+from kaji_db import PAGE_SIZE, Filters, diff_page
+from kaji_households import (
+    DEFAULT_HOUSEHOLD, HOUSEHOLD_DIR, MAX_OPEN, HouseholdRegistry, validate_household
 )
-""")
-conn.commit()
+from kaji_export import SNAPSHOT_FORMATS
+from kaji_fanout import household_files
+from kaji_maintenance import INTERVAL as MAINTENANCE_INTERVAL
+from kaji_maintenance import RETENTION_DAYS, MaintenanceJob
+from kaji_table import render_table
+from kaji_writeback import MAX_BATCH, MAX_DELAY
+
+
+# DB接続（家庭ごとの DB を LRU で開いておく。プール・キャッシュは家庭ごと）
+@st.cache_resource
+def get_registry():
+    base_dir = os.environ.get("KAJI_HOUSEHOLD_DIR", HOUSEHOLD_DIR)
+    max_open = int(os.environ.get("KAJI_MAX_OPEN_HOUSEHOLDS", MAX_OPEN))
+    # 何プロセスも並べるときは daemon に DB を任せる（KAJI_DAEMON_SOCKET を指定したときだけ）
+    socket_path = os.environ.get("KAJI_DAEMON_SOCKET")
+    if socket_path:
+        return RemoteHouseholds(socket_path, base_dir=base_dir, max_open=max_open)
+    write_behind = None
+    # 書き込みの後回し（KAJI_WRITE_BEHIND=1 のときだけ。登録をまとめてコミットする）
+    if os.environ.get("KAJI_WRITE_BEHIND", "") not in ("", "0"):
+        write_behind = {
+            "max_batch": int(os.environ.get("KAJI_WRITE_BEHIND_BATCH", MAX_BATCH)),
+            "max_delay": float(os.environ.get("KAJI_WRITE_BEHIND_DELAY", MAX_DELAY)),
+        }
+    return HouseholdRegistry(base_dir=base_dir, max_open=max_open, write_behind=write_behind)
+
+
+# メトリクス（KAJI_METRICS_PORT を指定したときだけ /metrics を出す）
+@st.cache_resource
+def start_metrics_exporter():
+    port = os.environ.get("KAJI_METRICS_PORT")
+    if not port:
+        return None
+    registry = get_registry()
+    return kaji_metrics.start_exporter(
+        int(port), files=lambda: household_files(registry.base_dir, registry.default_path)
+    )
+
+
+start_metrics_exporter()
+
+
+# 削除済みの行の片付け・VACUUM・optimize（裏のスレッドで。0 なら動かさない）
+@st.cache_resource
+def start_maintenance():
+    interval = float(os.environ.get("KAJI_MAINTENANCE_INTERVAL", MAINTENANCE_INTERVAL))
+    if interval <= 0 or os.environ.get("KAJI_DAEMON_SOCKET"):
+        return None  # daemon を使うときは daemon の側で動かす
+    registry = get_registry()
+    return MaintenanceJob(
+        lambda: household_files(registry.base_dir, registry.default_path), interval, registry
+    ).start()
+
+
+start_maintenance()
+
+# 計測（KAJI_PROFILE=1 のときだけ）
+kaji_metrics.start_run("app")
 
 # -------------------------
-# 削除処理（新しい query_params API）
+# 家庭の選択（?household=<ID> でも指定できる）
 # -------------------------
-params = st.query_params
+if "household" not in st.session_state:
+    st.session_state.household = st.query_params.get("household", DEFAULT_HOUSEHOLD)
 
-if "delete_id" in params:
-    raw = params["delete_id"]
+st.sidebar.text_input(
+    "家庭ID", key="household",
+    on_change=lambda: st.session_state.update(page_stack=[None], search_offset=0)
+)
+try:
+    household = validate_household(st.session_state.household)
+except ValueError as e:
+    # default に切り替えて続けると、打ち間違えた人が他の家庭（kaji.db）に書いてしまう
+    st.sidebar.error(str(e))
+    st.error("家庭IDを直すまで、記録の表示や登録はできやせん")
+    kaji_metrics.finish_run()
+    st.stop()
 
-    # リストでも文字列でも対応
-    if isinstance(raw, list):
-        raw = raw[0]
+if household == DEFAULT_HOUSEHOLD:
+    st.query_params.pop("household", None)
+else:
+    st.query_params["household"] = household
 
-    try:
-        delete_id = int(raw)
-        cur.execute("DELETE FROM kaji WHERE id = ?", (delete_id,))
-        conn.commit()
-    except Exception as e:
-        st.write("削除エラー:", e)
+with kaji_metrics.phase("repository"):
+    current = get_registry().handle(household)
+    repo = current.repo
+    write_behind = current.write_behind
 
-    # クエリパラメータをクリア
-    st.query_params = {}
-    st.rerun()
+PERSONS = repo.persons()
 
 
 # タイトル
 st.title("🏠家事 実績🐖")
 
+# 担当者の設定（家庭ごと）
+with st.sidebar.expander("担当者の設定"):
+    persons_text = st.text_input("担当者（カンマ区切り）", ", ".join(PERSONS), key=f"persons_{household}")
+    if st.button("保存", key="save_persons"):
+        try:
+            repo.set_persons(persons_text.replace("、", ",").split(","))
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.session_state.flash = "担当者を保存しやした！"
+            st.rerun()
+
 # -------------------------
-# 入力UI
+# ページング（id の降順でキーセット方式）
+# page_stack には各ページの「この id より古い行」の境界を積む
 # -------------------------
-time_value = st.slider("作業時間を選択", 1, 120, 15)
-person = st.radio("担当者を選択", ["Pi", "Mi"], horizontal=True)
-task = st.selectbox("家事の種類", [
+PAGE_SIZES = [10, 20, 50, 100]
+
+if "page_stack" not in st.session_state:
+    st.session_state.page_stack = [None]
+
+
+def reset_page():
+    st.session_state.page_stack = [None]
+
+
+def next_page(last_id):
+    st.session_state.page_stack.append(last_id)
+
+
+def prev_page():
+    if len(st.session_state.page_stack) > 1:
+        st.session_state.page_stack.pop()
+
+
+# -------------------------
+# 絞り込み（一覧・CSV・集計で共通。SQL の WHERE 句として DB 側で絞る）
+# -------------------------
+TASKS = [
     "🍳料理", "🫗皿洗い", "👕洗濯", "🧹掃除", "🛒買い物",
     "🚮ゴミ出し", "🛁風呂掃除", "🚽トイレ掃除", "💧水回り"
-])
-date = st.date_input("日付", datetime.now())
+]
+
+with st.sidebar.expander("🔎 絞り込み"):
+    filter_from = filter_to = None
+    if st.checkbox("期間で絞り込む", key="filter_use_range", on_change=reset_page):
+        filter_range = st.date_input(
+            "期間", (datetime.now() - timedelta(days=30), datetime.now()),
+            key="filter_range", on_change=reset_page
+        )
+        if len(filter_range) == 2:
+            filter_from, filter_to = filter_range
+    filter_persons = st.multiselect("担当者", PERSONS, key=f"filter_persons_{household}",
+                                    on_change=reset_page)
+    filter_tasks = st.multiselect("家事", TASKS, key="filter_tasks",
+                                  on_change=reset_page)
+filters = Filters.of(filter_from, filter_to, filter_persons, filter_tasks)
+
+# 登録・削除・取り込みのあとはアプリ全体を再実行するので、結果はここで出す
+if "flash" in st.session_state:
+    st.success(st.session_state.pop("flash"))
+
+
+def undo_delete(ids):
+    restored = repo.restore(ids)
+    st.session_state.flash = f"{restored}件 元に戻しやした！"
+
+
+# 削除の直後だけ「元に戻す」を出す（押さなくても保存期間のあいだはゴミ箱から戻せる）
+if "undo_ids" in st.session_state:
+    st.button("↩️ 元に戻す", on_click=undo_delete, args=(st.session_state.pop("undo_ids"),))
+
+# -------------------------
+# 画面はフラグメントに分けてあり、操作した部分だけが再実行される
+# データが変わったとき（登録・削除・取り込み）だけ st.rerun() で全体を描き直す
+# -------------------------
+
+
+# -------------------------
+# 入力UI（フォームなのでスライダー等を動かしても再実行されない）
+# -------------------------
+@st.fragment
+@kaji_metrics.profiled("entry_form")
+def entry_form():
+    with st.form("entry"):
+        time_value = st.slider("作業時間を選択", 1, 120, 15)
+        person = st.radio("担当者を選択", PERSONS, horizontal=True)
+        task = st.selectbox("家事の種類", TASKS)
+        date = st.date_input("日付", datetime.now())
+        note = st.text_input("メモ（任意）", max_chars=200)
+        submitted = st.form_submit_button("登録")
+
+    if submitted:
+        if write_behind is not None:
+            write_behind.submit(date, task, person, time_value, note)
+        else:
+            repo.insert(date, task, person, time_value, note)
+        reset_page()  # 登録した行が見えるよう最新のページに戻す
+        st.session_state.flash = "登録しやした！"
+        st.rerun()
 
-if st.button("登録"):
-    cur.execute(
-        "INSERT INTO kaji (date, task, person, time) VALUES (?, ?, ?, ?)",
-        (str(date), task, person, f"{time_value}分")
-    )
-    conn.commit()
-    st.success("登録しやした！")
-    st.rerun()
 
 # -------------------------
-# 一覧表示
+# 表示・ダウンロード（実際に渡したバイト数を数える）
 # -------------------------
+def show_table(df):
+    html = render_table(df)
+    kaji_metrics.add_bytes(len(html.encode("utf-8")))
+    st.markdown(html, unsafe_allow_html=True)
+
 
-df = pd.read_sql_query("SELECT * FROM kaji ORDER BY id DESC", conn)
-# CSVダウンロード
-csv = df.to_csv(index=False).encode("utf-8")
-st.download_button("📥 CSVをダウンロード", csv, "kaji.csv", "text/csv")
+def queued_frame(rows):
+    """write-behind のキューにある (date, task, person, minutes, note) を表の形にする"""
+    return pd.DataFrame({
+        "id": ["…"] * len(rows),
+        "date": [str(row[0]) for row in rows],
+        "task": [row[1] for row in rows],
+        "person": [row[2] for row in rows],
+        "time": [f"{row[3]}分" for row in rows],
+        "note": [row[4] for row in rows],
+    })
+
+
+def sent(data):
+    kaji_metrics.add_bytes(len(data), "download")
+    return data
 
 
 # -------------------------
-# 削除機能
+# エクスポート・取り込み
 # -------------------------
+@st.fragment
+@kaji_metrics.profiled("export_section")
+def export_section():
+    # CSVダウンロード（ボタンが押されたときだけ作る。絞り込みの条件で書き出す）
+    with st.expander("📥 CSVダウンロード"):
+        if filters:
+            st.caption("サイドバーの絞り込みに合う行だけを書き出します")
+        export_gzip = st.checkbox("gzip で圧縮する", key="export_gzip")
+
+        st.download_button(
+            "📥 CSVをダウンロード",
+            lambda: sent(repo.cached(
+                ("csv", filters, export_gzip),
+                lambda: current.export_csv(filters, export_gzip).read()
+            )),
+            "kaji.csv.gz" if export_gzip else "kaji.csv",
+            "application/gzip" if export_gzip else "text/csv",
+        )
 
-def delete_task(task_id):
-    cur.execute("DELETE FROM kaji WHERE id = ?", (task_id,))
-    conn.commit()
+    # 分析用スナップショット（型付きの列指向形式。ノートブックでそのまま読める）
+    with st.expander("📦 分析用スナップショット（Arrow / Parquet）"):
+        snapshot_fmt = st.radio("形式", list(SNAPSHOT_FORMATS), horizontal=True, key="snapshot_fmt")
+        snapshot_since = st.number_input(
+            "この id より後だけ（0 なら全件）", min_value=0, step=1, key="snapshot_since"
+        )
+        ext, mime = SNAPSHOT_FORMATS[snapshot_fmt]
+        st.download_button(
+            "📦 スナップショットをダウンロード",
+            lambda: sent(repo.cached(
+                ("snapshot", snapshot_since, snapshot_fmt),
+                lambda: current.export_snapshot(snapshot_since, snapshot_fmt)[0].read()
+            )),
+            f"kaji_since_{snapshot_since}.{ext}",
+            mime,
+        )
+        st.caption(
+            "ファイルのメタデータ last_id を次回の「この id より後だけ」に入れると新しく登録した行だけ取れます。"
+            "一覧で直した行・削除した行は反映されないので、そのときは 0 で全件を取り直してください"
+        )
 
-st.subheader("実績一覧")
+    # CSVから取り込み（ダウンロードした CSV や古い版の CSV を一括で戻す）
+    with st.expander("📤 CSVから取り込み"):
+        uploaded = st.file_uploader("CSVファイル", type=["csv", "gz"], key="import_file")
+        if uploaded is not None and st.button("取り込む"):
+            try:
+                result = current.import_csv(
+                    uploaded, compression="gzip" if uploaded.name.endswith(".gz") else None
+                )
+            except ValueError as e:
+                st.error(f"取り込みエラー: {e}")
+            else:
+                st.session_state.flash = (
+                    f"{result.inserted}件 取り込みやした！"
+                    f"（重複 {result.duplicates}件・不正 {result.invalid}件 はスキップ）"
+                )
+                st.rerun()
 
-df = pd.read_sql_query("SELECT * FROM kaji ORDER BY id DESC", conn)
 
-# 削除ボタン付きの表を作る
-for index, row in df.iterrows():
-    cols = st.columns([1, 2, 2, 2, 2, 2])  # 表示の幅調整
-    cols[0].write(row["id"])
-    cols[1].write(row["date"])
-    cols[2].write(row["task"])
-    cols[3].write(row["person"])
-    cols[4].write(row["time"])
-    if cols[5].button("削除", key=f"del_{row['id']}"):
-        delete_task(row["id"])
+# -------------------------
+# 一覧の編集（表示中のページを表で直して、保存で差分だけまとめて反映）
+# フォームの中なので、セルを直しても保存を押すまで再実行されない
+# -------------------------
+def edit_page(page_df):
+    editable = page_df[["id", "date", "task", "person", "minutes", "note"]].assign(
+        date=pd.to_datetime(page_df["date"]).dt.date,
+        delete=False,
+    )
+    with st.form(f"edit_{household}_{st.session_state.page_stack[-1]}"):
+        edited = st.data_editor(
+            editable,
+            hide_index=True,
+            disabled=["id"],
+            column_config={
+                "id": st.column_config.NumberColumn("ID"),
+                "date": st.column_config.DateColumn("日付", required=True),
+                # 今は選べない値（昔の家事名など）でも消えないよう選択肢に足す
+                "task": st.column_config.SelectboxColumn(
+                    "家事", options=list(dict.fromkeys(TASKS + page_df["task"].tolist())),
+                    required=True),
+                "person": st.column_config.SelectboxColumn(
+                    "担当", options=list(dict.fromkeys(PERSONS + page_df["person"].tolist())),
+                    required=True),
+                "minutes": st.column_config.NumberColumn(
+                    "時間（分）", min_value=0, max_value=24 * 60, step=1, required=True),
+                "note": st.column_config.TextColumn("メモ", max_chars=200),
+                "delete": st.column_config.CheckboxColumn("削除"),
+            },
+        )
+        saved = st.form_submit_button("変更を保存")
+
+    if saved:
+        try:
+            updates, deletes = diff_page(page_df, edited)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if not updates and not deletes:
+            st.info("変更はありやせん")
+            return
+        updated, deleted = repo.apply_changes(updates, deletes)
+        st.session_state.flash = f"{updated}件 直して {deleted}件 消しやした！"
+        if deletes:
+            st.session_state.undo_ids = deletes
         st.rerun()
 
+
+def trash():
+    with st.expander(f"🗑 削除した行（{RETENTION_DAYS}日以内なら戻せます）"):
+        deleted_df = repo.list_deleted(50)
+        if deleted_df.empty:
+            st.write("ありやせん")
+            return
+        show_table(deleted_df)
+        ids = st.multiselect("戻す行の ID", deleted_df["id"].tolist(), key=f"restore_{household}")
+        if ids and st.button("元に戻す", key="restore"):
+            undo_delete(ids)
+            st.rerun()
+
+
+# -------------------------
+# 一覧表示（ページ送りはこのフラグメントだけ再実行）
+# -------------------------
+@st.fragment
+@kaji_metrics.profiled("history")
+def history():
+    st.subheader("実績一覧")
+
+    page_size = st.selectbox(
+        "表示件数", PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE),
+        key="page_size", on_change=reset_page
+    )
+
+    page_df, has_more = repo.list_page(st.session_state.page_stack[-1], page_size, filters)
+    if filters:
+        st.caption("絞り込み中")
+
+    # 保存できなかった登録（書き込みを後回しにしているとき）は消さずに見せる
+    failed = write_behind.failed_rows() if write_behind is not None else []
+    if failed:
+        st.error(f"保存できなかった登録が {len(failed)}件ありやす: {failed[-1][1]}")
+        show_table(queued_frame([row for row, _ in failed]))
+        retry, discard = st.columns(2)
+        if retry.button("もう一度保存", key="retry_failed"):
+            write_behind.retry_failed()
+            st.rerun()
+        if discard.button("あきらめる", key="discard_failed"):
+            write_behind.discard_failed()
+            st.rerun()
+
+    # まだコミットされていない登録（書き込みを後回しにしているとき）も先頭に見せる
+    pending = write_behind.pending_rows() if write_behind is not None else []
+    if pending and len(st.session_state.page_stack) == 1 and not filters:
+        st.caption(f"保存待ち {len(pending)}件")
+        show_table(queued_frame(pending))
+
+    if st.toggle("✏️ 編集・削除", key="edit_mode"):
+        edit_page(page_df)
+        trash()
+    else:
+        show_table(page_df)
+
+    nav = st.columns(3)
+    page_no = len(st.session_state.page_stack)
+    if page_no > 1:
+        nav[0].button("◀ 新しい方へ", on_click=prev_page)
+        nav[1].button("最新に戻る", on_click=reset_page)
+    if has_more:
+        nav[2].button("もっと見る ▶", on_click=next_page, args=(int(page_df["id"].iloc[-1]),))
+    st.caption(f"{page_no}ページ目")
+
+
+# -------------------------
+# 検索（全文検索の索引を使うので履歴が長くても入力のたびに引ける）
+# -------------------------
+SEARCH_PAGE_SIZE = 20
+
+
+def reset_search_page():
+    st.session_state.search_offset = 0
+
+
+@st.fragment
+@kaji_metrics.profiled("search")
+def search():
+    st.subheader("検索")
+
+    text = st.text_input(
+        "家事・担当・メモで検索（空白で区切るとすべて含むもの）",
+        key="search_text", on_change=reset_search_page,
+        placeholder="例: 風呂 カビ",
+    )
+    if not text.strip():
+        return
+
+    offset = st.session_state.get("search_offset", 0)
+    found, has_more = repo.search(text, SEARCH_PAGE_SIZE, offset)
+    if found.empty:
+        st.write("見つかりやせんでした")
+        return
+
+    show_table(found)
+
+    nav = st.columns(2)
+    if offset > 0:
+        nav[0].button("◀ 前の結果", key="search_prev",
+                      on_click=lambda: st.session_state.update(
+                          search_offset=max(0, offset - SEARCH_PAGE_SIZE)))
+    if has_more:
+        nav[1].button("次の結果 ▶", key="search_next",
+                      on_click=lambda: st.session_state.update(
+                          search_offset=offset + SEARCH_PAGE_SIZE))
+    st.caption(f"{offset + 1}〜{offset + len(found)}件目（関連の高い順）")
+
+
+# -------------------------
+# 集計（集計テーブルから読むので履歴の長さに関係なく軽い）
+# -------------------------
+PERIODS = {"日": ("day", 30), "週": ("week", 7 * 12), "月": ("month", 365)}
+
+
+@st.fragment
+@kaji_metrics.profiled("stats")
+def stats():
+    st.subheader("集計")
+
+    period_label = st.radio("集計の単位", list(PERIODS), horizontal=True, key="period")
+    period, days_back = PERIODS[period_label]
+    since = ""
+    if not filters.date_from:  # 期間で絞り込んでいればその期間、なければ直近だけ
+        since = (datetime.now() - timedelta(days=days_back)).date().isoformat()
+        if period == "month":
+            since = since[:7]
+
+    by_person = repo.rollup(period, "person", since, filters)
+    if by_person.empty:
+        st.write("該当するデータがありません" if filters else "まだデータがありません")
+        return
+
+    st.write("担当者ごとの作業時間（分）")
+    st.bar_chart(by_person.pivot(index="bucket", columns="person", values="minutes").fillna(0))
+
+    by_task = repo.rollup(period, "task", since, filters)
+    st.write("家事ごとの作業時間（分）")
+    st.dataframe(
+        by_task.groupby("task")[["minutes", "count"]].sum()
+        .sort_values("minutes", ascending=False)
+    )
+
+
+entry_form()
+export_section()
+history()
+search()
+stats()
+
+
+# -------------------------
+# デバッグ用の計測パネル（KAJI_PROFILE=1 のときだけ）
+# -------------------------
+def debug_panel():
+    runs = kaji_metrics.recent_runs()
+    with st.sidebar.expander("🔧 計測", expanded=False):
+        profile = kaji_metrics.current()
+        if profile is not None:
+            st.write("今回の実行")
+            st.json(profile.as_dict())
+        if runs:
+            st.write(f"直近 {len(runs)} 回の p50 / p95 / p99（秒）")
+            st.dataframe(pd.DataFrame(kaji_metrics.summary(runs)).T)
+            st.write("直近の実行")
+            st.dataframe(pd.DataFrame(
+                [r.as_dict() for r in runs[-20:]]
+            ).drop(columns="phases").iloc[::-1])
+        st.write("書き込みロック（この家庭）")
+        st.json(current.write_stats())
+
+
+if kaji_metrics.enabled():
+    debug_panel()
+kaji_metrics.finish_run()
+
 # -------------------------
 # バージョン履歴（expander）
 # -------------------------
 with st.expander("バージョン履歴"):
     st.write("""
+- v1.24 負荷試験（kaji_load.py で何人ぶんものセッションを流して遅延とロック待ちを測る）
+- v1.23 何プロセスも並べて動かせるように（KAJI_DAEMON_SOCKET で DB を daemon に任せる）
+- v1.22 同時に書き込んでも固まらないように（書き込みは1本の接続で順番に、混んだらやり直す）
+- v1.21 削除を取り消せるように（7日間はゴミ箱から戻せる。古い削除は裏で片付け）
+- v1.20 一覧を表のまま編集・まとめて削除できるように（保存1回で反映）
+- v1.19 期間・担当者・家事での絞り込みを追加（一覧・CSV・集計に共通）
+- v1.18 メモ欄と検索を追加（家事・担当・メモの全文検索）
+- v1.17 家庭ごとにデータを分けられるように（家庭ID・担当者の設定）
+- v1.16 登録をまとめて書き込むモードを追加（KAJI_WRITE_BEHIND=1）
+- v1.15 実績一覧をスマホ向けの表（横スクロール・改行なし）に統一
+- v1.14 Prometheus 形式のメトリクスを追加（KAJI_METRICS_PORT）
+- v1.13 計測パネルを追加（KAJI_PROFILE=1）
+- v1.12 一覧・集計・エクスポートの結果をキャッシュ（DBが変わったら自動で破棄）
+- v1.11 入力をフォームにまとめ、一覧・集計を部分的に再実行するように変更
+- v1.10 CSVからの一括取り込みを追加
+- v1.9 分析用スナップショット（Arrow / Parquet）を追加
+- v1.8 CSVダウンロードを押したときだけ作るように変更（期間・担当者・gzip）
+- v1.7 日・週・月の集計を追加
+- v1.6 作業時間を数値（分）で保存するように変更
+- v1.5 実績一覧をページ表示に変更
+- v1.4 DB接続をプール化（WAL）
 - v1.3 削除機能を追加
 - v1.2 UI を改善
 - v1.1 データベース保存を安定化
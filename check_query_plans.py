@@ -0,0 +1,77 @@
+"""アプリが使うクエリの実行計画を確認する。
+
+インデックスを消したりクエリを書き換えたりして表の全件スキャンに戻ったら
+非0で終了するので、変更のたびに `python check_query_plans.py` で確認する。
+"""
+import os
+import sys
+import tempfile
+
+from kaji_db import ConnectionPool, Filters, KajiRepository, explain
+from kaji_maintenance import PURGE_SQL
+
+R = KajiRepository
+
+# (名前, SQL, パラメータ, 計画に含まれるべき文字列)
+# 絞り込みのあるクエリはアプリと同じ組み立て（page_query / rollup_query）で作る
+CHECKS = [
+    ("新しい順の一覧", *R.page_query(None, 21), None),
+    ("新しい順の一覧（続き）", *R.page_query(100, 21), "INTEGER PRIMARY KEY"),
+    ("期間の絞り込み", R.RANGE_SQL, ("2025-01-01", "2025-01-31"), "idx_kaji_date"),
+    ("担当者別の合計", R.TOTAL_SQL, (), "COVERING INDEX idx_kaji_person"),
+    ("家事別の合計", R.TOTAL_BY_TASK_SQL, (), "COVERING INDEX idx_kaji_task"),
+    ("集計（担当者別）", *R.rollup_query("week", "person", "2025-01-01"),
+     "kaji_rollup USING PRIMARY KEY"),
+    ("集計（絞り込み）",
+     *R.rollup_query("month", "task", "", Filters.of("2025-01-01", "2025-06-30", ["Pi"])),
+     "kaji_rollup USING PRIMARY KEY"),
+    ("一覧（期間で絞り込み）",
+     *R.page_query(None, 21, Filters.of("2025-01-01", "2025-01-31")), "idx_kaji_date"),
+    ("削除した行", R.DELETED_SQL, (50,), "idx_kaji_deleted"),
+    ("保存期間を過ぎた行の削除", PURGE_SQL, (1700000000, 500), "idx_kaji_deleted"),
+    ("一覧（担当者で絞り込み）", *R.page_query(100, 21, Filters.of(persons=["Pi"])),
+     "INTEGER PRIMARY KEY"),
+    ("一覧（家事と期間で絞り込み）",
+     *R.page_query(100, 21, Filters.of("2025-01-01", "2025-01-31", tasks=["🍳料理"])),
+     "idx_kaji_task"),
+    ("検索", R.SEARCH_MATCH_SQL.format(window=R.SEARCH_WINDOW_SQL.format(where=""), where=""),
+     ('"風呂掃除"', '"風呂掃除"', R.SEARCH_RANK_WINDOW, 21, 0), "kaji_fts VIRTUAL TABLE INDEX"),
+    ("検索（順位付けより古い一致）", R.SEARCH_OLDER_SQL.format(where=""),
+     ('"風呂掃除"', 100, 21, 0), "kaji_fts VIRTUAL TABLE INDEX"),
+]
+
+
+def is_full_scan(detail):
+    # "SCAN kaji" だけならテーブル本体の全件読み。インデックス経由なら OK
+    return detail.startswith("SCAN kaji") and "INDEX" not in detail and "KEY" not in detail
+
+
+def check(conn, checks=CHECKS):
+    failures = []
+    for name, sql, params, expected in checks:
+        plan = explain(conn, sql, params)
+        # ORDER BY id DESC は rowid を逆順に辿るだけなので SCAN kaji でも良い
+        scans = [d for d in plan if is_full_scan(d)]
+        if scans and "ORDER BY id DESC" not in sql:
+            failures.append(f"{name}: 全件スキャン {plan}")
+        elif expected and not any(expected in d for d in plan):
+            failures.append(f"{name}: {expected!r} が計画にない {plan}")
+    return failures
+
+
+def main(path=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(path or os.path.join(tmp, "plans.db"))
+        with pool.reader() as conn:
+            failures = check(conn)
+        pool.close()
+
+    for failure in failures:
+        print("NG", failure)
+    if not failures:
+        print(f"OK {len(CHECKS)} 件")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,53 @@
+"""kaji.db のメンテナンス用コマンド。
+
+    python kaji_admin.py rebuild-rollups [--db kaji.db]
+    python kaji_admin.py maintain [--db kaji.db]
+    python kaji_admin.py enable-incremental-vacuum [--db kaji.db]
+"""
+import argparse
+
+from kaji_db import DB_PATH, ConnectionPool, KajiRepository
+from kaji_maintenance import maintain
+
+
+def cmd_rebuild_rollups(repo, args):
+    repo.rebuild_rollups()
+    print("集計テーブルを作り直しました")
+
+
+def cmd_maintain(repo, args):
+    result = maintain(repo.pool)
+    print(f"削除済みの行を {result['purged']}行 消し、空きページを {result['freed_pages']} 返しました")
+
+
+def cmd_enable_incremental_vacuum(repo, args):
+    """既存の DB を auto_vacuum=INCREMENTAL にする（VACUUM で作り直すので使っていないときに）"""
+    with repo.pool.writer() as conn:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    print(f"auto_vacuum = {mode}（2 = INCREMENTAL）")
+
+
+COMMANDS = {
+    "rebuild-rollups": cmd_rebuild_rollups,
+    "maintain": cmd_maintain,
+    "enable-incremental-vacuum": cmd_enable_incremental_vacuum,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="kaji.db のメンテナンス")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--db", default=DB_PATH, help="DBファイル（既定: kaji.db）")
+    args = parser.parse_args(argv)
+
+    pool = ConnectionPool(args.db)
+    try:
+        COMMANDS[args.command](KajiRepository(pool), args)
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
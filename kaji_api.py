@@ -0,0 +1,337 @@
+"""家事の記録用の軽い JSON API（ショートカットやスクリプトから使う）。
+
+    python kaji_api.py --port 8502
+
+    POST   /chores          {"date": "2025-02-08", "task": "🍳料理", "person": "Pi", "minutes": 15,
+                             "note": "任意のメモ"}
+    DELETE /chores/<id>             （論理削除。保存期間のあいだは restore で戻せる）
+    POST   /chores/<id>/restore
+    GET    /chores?before_id=<id>&limit=20&from=2025-01-01&to=2025-01-31&person=Pi&task=🍳料理
+    GET    /search?q=風呂 カビ&limit=20&offset=0
+    GET    /stats?period=week&by=person&since=2025-01-01（from / to / person / task も使える）
+
+asyncio で動かし、SQLite の処理はスレッドプールに逃がす。同時に来た登録は
+InsertBatcher が短い時間窓でまとめて1トランザクション（コミット1回）で入れる。
+"""
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type
+from urllib.parse import parse_qs, urlsplit
+
+from kaji_db import (
+    DB_PATH, PAGE_SIZE, ROLLUP_PERIODS, ConnectionPool, Filters, KajiRepository, QueryCache
+)
+
+logger = logging.getLogger("kaji.api")
+
+BATCH_MAX = 256
+BATCH_WINDOW = 0.005  # 秒。最初の1件が来てからこれだけ待って集める
+MAX_BODY_BYTES = 64 * 1024
+MAX_MINUTES = 24 * 60
+MAX_LIMIT = 500
+MAX_NOTE = 500
+MAX_ID = 2 ** 63 - 1  # SQLite の INTEGER に収まる上限。超えると DB 側で OverflowError になる
+
+
+class BadRequest(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+def validate_chore(payload):
+    """登録内容を検証して (date, task, person, minutes, note) を返す"""
+    if not isinstance(payload, dict):
+        raise BadRequest("JSON オブジェクトを送ってください")
+    try:
+        day = date_type.fromisoformat(str(payload.get("date") or date_type.today()))
+    except ValueError:
+        raise BadRequest("date は YYYY-MM-DD")
+    task = payload.get("task")
+    person = payload.get("person")
+    if not isinstance(task, str) or not task.strip():
+        raise BadRequest("task が必要です")
+    if not isinstance(person, str) or not person.strip():
+        raise BadRequest("person が必要です")
+    minutes = payload.get("minutes")
+    if isinstance(minutes, bool) or not isinstance(minutes, int) or not 0 <= minutes <= MAX_MINUTES:
+        raise BadRequest(f"minutes は 0〜{MAX_MINUTES} の整数")
+    note = payload.get("note") or ""
+    if not isinstance(note, str) or len(note) > MAX_NOTE:
+        raise BadRequest(f"note は {MAX_NOTE} 文字までの文字列")
+    return day.isoformat(), task.strip(), person.strip(), minutes, note.strip()
+
+
+def _int_param(query, name, default=None, minimum=None, maximum=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise BadRequest(f"{name} は整数")
+    if minimum is not None and value < minimum:
+        raise BadRequest(f"{name} は {minimum} 以上")
+    if maximum is not None and value > maximum:
+        raise BadRequest(f"{name} は {maximum} 以下")
+    return value
+
+
+def _path_id(text):
+    """パスの id。整数でない・範囲外の id はその行がないのと同じ扱い"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise NotFound()
+    if not 1 <= value <= MAX_ID:
+        raise NotFound()
+    return value
+
+
+def _filters(query):
+    """from / to / person（複数可）/ task（複数可）を Filters にする"""
+    try:
+        return Filters.of(query.get("from", [None])[0], query.get("to", [None])[0],
+                          query.get("person"), query.get("task"))
+    except ValueError:
+        raise BadRequest("from / to は YYYY-MM-DD")
+
+
+# -------------------------
+# 登録のグループコミット
+# -------------------------
+class InsertBatcher:
+    """同時に来た登録をまとめて repo.insert_many で1回のコミットにする"""
+
+    def __init__(self, repo, executor, max_batch=BATCH_MAX, window=BATCH_WINDOW):
+        self.repo = repo
+        self.executor = executor
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """キューに残っている分を入れ終わってから止める"""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    async def insert(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            items = [item]
+            if self.window:
+                await asyncio.sleep(self.window)
+            while len(items) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
+            await self._flush(items)
+
+    async def _flush(self, items):
+        if not items:
+            return
+        rows = [row for row, _ in items]
+        loop = asyncio.get_running_loop()
+        try:
+            ids = await loop.run_in_executor(self.executor, self.repo.insert_many, rows)
+        except Exception as e:
+            logger.exception("まとめて登録に失敗（%d件）", len(items))
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), new_id in zip(items, ids):
+            if not future.done():
+                future.set_result(new_id)
+
+
+# -------------------------
+# HTTP（必要な分だけの HTTP/1.1）
+# -------------------------
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class KajiApi:
+    def __init__(self, repo, workers=4, batch_max=BATCH_MAX, batch_window=BATCH_WINDOW):
+        self.repo = repo
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kaji-api")
+        self.batcher = InsertBatcher(repo, self.executor, batch_max, batch_window)
+
+    async def _db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def dispatch(self, method, path, query, body):
+        parts = [p for p in path.split("/") if p]
+        if parts == ["chores"]:
+            if method == "POST":
+                try:
+                    payload = json.loads(body or b"null")
+                except ValueError:
+                    raise BadRequest("JSON が読めません")
+                new_id = await self.batcher.insert(validate_chore(payload))
+                return 201, {"id": new_id}
+            if method == "GET":
+                before_id = _int_param(query, "before_id", minimum=1, maximum=MAX_ID)
+                limit = _int_param(query, "limit", PAGE_SIZE, 1, MAX_LIMIT)
+                df, has_more = await self._db(self.repo.list_page, before_id, limit,
+                                              _filters(query))
+                return 200, {"items": df.to_dict("records"), "has_more": bool(has_more)}
+            return 405, {"error": "method not allowed"}
+        if len(parts) == 3 and parts[0] == "chores" and parts[2] == "restore":
+            if method != "POST":
+                return 405, {"error": "method not allowed"}
+            task_id = _path_id(parts[1])
+            if not await self._db(self.repo.restore, [task_id]):
+                raise NotFound()
+            return 200, {"restored": task_id}
+        if len(parts) == 2 and parts[0] == "chores":
+            if method != "DELETE":
+                return 405, {"error": "method not allowed"}
+            task_id = _path_id(parts[1])
+            if not await self._db(self.repo.delete, task_id):
+                raise NotFound()
+            return 200, {"deleted": task_id}
+        if parts == ["search"]:
+            if method != "GET":
+                return 405, {"error": "method not allowed"}
+            limit = _int_param(query, "limit", PAGE_SIZE, 1, MAX_LIMIT)
+            offset = _int_param(query, "offset", 0, 0, MAX_ID)
+            df, has_more = await self._db(self.repo.search, query.get("q", [""])[0], limit, offset)
+            return 200, {"items": df.to_dict("records"), "has_more": bool(has_more)}
+        if parts == ["stats"]:
+            if method != "GET":
+                return 405, {"error": "method not allowed"}
+            period = query.get("period", ["day"])[0]
+            by = query.get("by", ["person"])[0]
+            since = query.get("since", [""])[0]
+            if period not in ROLLUP_PERIODS or by not in ("person", "task"):
+                raise BadRequest(f"period は {tuple(ROLLUP_PERIODS)}、by は person か task")
+            df = await self._db(self.repo.rollup, period, by, since, _filters(query))
+            return 200, {"items": df.to_dict("records")}
+        raise NotFound()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Content-Length が読めません"},
+                                        keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                url = urlsplit(target)
+                try:
+                    status, payload = await self.dispatch(method, url.path, parse_qs(url.query), body)
+                except BadRequest as e:
+                    status, payload = 400, {"error": str(e)}
+                except NotFound:
+                    status, payload = 404, {"error": "not found"}
+                except Exception:
+                    logger.exception("%s %s", method, target)
+                    status, payload = 500, {"error": "internal error"}
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info("kaji api: http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="家事の記録用 JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, default=4, help="SQLite 用のスレッド数")
+    parser.add_argument("--batch-max", type=int, default=BATCH_MAX)
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW,
+                        help="登録をまとめる時間窓 [秒]")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    pool = ConnectionPool(args.db, size=args.workers)
+    repo = KajiRepository(pool, QueryCache(args.db))
+    api = KajiApi(repo, args.workers, args.batch_max, args.batch_window)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
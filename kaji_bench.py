@@ -0,0 +1,255 @@
+"""合成データで Kaji.py（と昔の版）の描画を計測するベンチマーク。
+
+    python kaji_bench.py                       # 1k / 100k / 1M 行で Kaji.py を計測
+    python kaji_bench.py --sizes 1000 --variants Kaji.py kaji_ver1.py
+    python kaji_bench.py --out new.json --compare old.json
+
+データは seed 固定で毎回同じものを作る。各版を Streamlit の AppTest で
+画面なしに動かし、フェーズごとの時間とピークメモリ（tracemalloc）を JSON に
+書き出すので、前回の結果と突き合わせれば遅くなったところが分かる。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TASKS = [
+    "🍳料理", "🫗皿洗い", "👕洗濯", "🧹掃除", "🛒買い物",
+    "🚮ゴミ出し", "🛁風呂掃除", "🚽トイレ掃除", "💧水回り"
+]
+# 家事ごとの（1日あたりの平均回数, 作業時間の中央値[分]）
+TASK_PROFILE = {
+    "🍳料理": (2.0, 30),
+    "🫗皿洗い": (2.0, 15),
+    "👕洗濯": (0.8, 20),
+    "🧹掃除": (0.4, 25),
+    "🛒買い物": (0.5, 40),
+    "🚮ゴミ出し": (0.4, 5),
+    "🛁風呂掃除": (0.3, 15),
+    "🚽トイレ掃除": (0.2, 10),
+    "💧水回り": (0.2, 15),
+}
+PERSONS = {"Pi": 0.55, "Mi": 0.45}
+
+SIZES = [1_000, 100_000, 1_000_000]
+VARIANTS = {
+    "Kaji.py": "current",
+    "kaji_ver1.py": "legacy",
+    "02102204_エラーは出るが消えるのを混ぜたやつ.py": "legacy",
+}
+# 昔の版は1行ごとにウィジェットを作るので、大きいデータでは終わらない
+LEGACY_MAX_ROWS = 10_000
+SEED = 20250208
+
+
+# -------------------------
+# 合成データ
+# -------------------------
+def generate_chores(rows, seed=SEED, end=date(2025, 12, 31)):
+    """(date, task, person, minutes) を古い順に rows 件作る。
+
+    1日あたりの件数は TASK_PROFILE の合計（約7件）を目安にしているので、
+    rows を増やすとそのぶん過去にさかのぼる（100万行でおよそ400年分）。
+    """
+    rng = random.Random(seed)
+    per_day = sum(weight for weight, _ in TASK_PROFILE.values())
+
+    days = max(1, round(rows / per_day))
+    start = end - timedelta(days=days - 1)
+    return [random_chore(rng, start + timedelta(days=i * days // rows)) for i in range(rows)]
+
+
+def random_chore(rng, day):
+    """TASK_PROFILE・PERSONS の割合で day の1件 (date, task, person, minutes) を作る"""
+    tasks = list(TASK_PROFILE)
+    task = rng.choices(tasks, [TASK_PROFILE[t][0] for t in tasks])[0]
+    median = TASK_PROFILE[task][1]
+    # 作業時間は右に裾の長い分布（対数正規）で 1〜120 分に収める
+    minutes = min(120, max(1, round(rng.lognormvariate(0, 0.5) * median)))
+    person = rng.choices(list(PERSONS), list(PERSONS.values()))[0]
+    return (day.isoformat(), task, person, minutes)
+
+
+def write_legacy_db(path, chores):
+    """昔の版と同じ time TEXT（"15分"）形式で kaji.db を作る"""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS kaji (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        task TEXT,
+        person TEXT,
+        time TEXT
+    )
+    """)
+    conn.executemany(
+        "INSERT INTO kaji (date, task, person, time) VALUES (?, ?, ?, ?)",
+        ((d, t, p, f"{m}分") for d, t, p, m in chores),
+    )
+    conn.commit()
+    conn.close()
+
+
+# -------------------------
+# 計測
+# -------------------------
+class PhaseRecorder:
+    def __init__(self, variant, rows, trace_memory=True):
+        self.variant = variant
+        self.rows = rows
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def measure(self, phase, fn):
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        error = None
+        try:
+            fn()
+        except Exception as e:  # 1つのフェーズが落ちても残りは計測する
+            error = repr(e)
+        seconds = time.perf_counter() - started
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.results.append({
+            "variant": self.variant, "rows": self.rows, "phase": phase,
+            "seconds": round(seconds, 6), "peak_bytes": peak, "error": error,
+        })
+        return error is None
+
+
+def _click(at, label):
+    buttons = [b for b in at.button if b.label == label]
+    if not buttons:
+        raise LookupError(f"ボタン {label!r} が見つかりません")
+    buttons[0].click().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def _run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def bench_variant(variant, rows, chores, timeout, trace_memory=True):
+    from streamlit.testing.v1 import AppTest
+    import streamlit as st
+
+    recorder = PhaseRecorder(variant, rows, trace_memory)
+    workdir = tempfile.mkdtemp(prefix="kaji_bench_")
+    cwd = os.getcwd()
+    try:
+        write_legacy_db(os.path.join(workdir, "kaji.db"), chores)
+        # どの版も相対パスの kaji.db を開くので、作業ディレクトリごと差し替える
+        os.chdir(workdir)
+        st.cache_resource.clear()
+        st.cache_data.clear()
+
+        if VARIANTS.get(variant) == "current":
+            # スキーマ移行は1回きりなので描画とは分けて測る
+            from kaji_db import ConnectionPool
+
+            recorder.measure("migrate", lambda: ConnectionPool("kaji.db").close())
+
+        at = AppTest.from_file(os.path.join(HERE, variant), default_timeout=timeout)
+        if not recorder.measure("first_run", lambda: _run(at)):
+            return recorder.results
+        recorder.measure("rerun", lambda: _run(at))
+        recorder.measure("register", lambda: _click(at, "登録"))
+        if VARIANTS.get(variant) == "current":
+            recorder.measure("next_page", lambda: _click(at, "もっと見る ▶"))
+    finally:
+        os.chdir(cwd)
+        st.cache_resource.clear()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return recorder.results
+
+
+def run(sizes, variants, timeout, legacy_max_rows, trace_memory=True, seed=SEED):
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    results = []
+    for rows in sizes:
+        chores = generate_chores(rows, seed)
+        for variant in variants:
+            if VARIANTS.get(variant) != "current" and rows > legacy_max_rows:
+                results.append({"variant": variant, "rows": rows, "phase": "skipped",
+                                "seconds": None, "peak_bytes": None,
+                                "error": f"rows > {legacy_max_rows}"})
+                continue
+            for result in bench_variant(variant, rows, chores, timeout, trace_memory):
+                print(_format(result), flush=True)
+                results.append(result)
+    return results
+
+
+def _format(r):
+    mem = "" if r["peak_bytes"] is None else f"  peak {r['peak_bytes'] / 1e6:8.1f} MB"
+    err = f"  ERROR {r['error']}" if r["error"] else ""
+    return f"{r['variant']:>24}  {r['rows']:>9,}  {r['phase']:<10} {r['seconds']:9.3f} s{mem}{err}"
+
+
+def compare(old_results, new_results):
+    """同じ (variant, rows, phase) どうしの時間の比を表示する"""
+    old = {(r["variant"], r["rows"], r["phase"]): r for r in old_results}
+    for r in new_results:
+        before = old.get((r["variant"], r["rows"], r["phase"]))
+        if not before or not before["seconds"] or r["seconds"] is None:
+            continue
+        ratio = r["seconds"] / before["seconds"]
+        mark = "  ⚠遅くなった" if ratio > 1.2 else ""
+        print(f"{r['variant']:>24}  {r['rows']:>9,}  {r['phase']:<10} "
+              f"{before['seconds']:9.3f} -> {r['seconds']:9.3f} s  x{ratio:.2f}{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kaji.py のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--variants", nargs="+", default=["Kaji.py"],
+                        help=f"計測する版（{', '.join(VARIANTS)}）")
+    parser.add_argument("--legacy-max-rows", type=int, default=LEGACY_MAX_ROWS)
+    parser.add_argument("--timeout", type=float, default=600, help="1回の描画の上限[秒]")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="tracemalloc を使わない（時間だけをより正確に測る）")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="前回の結果 JSON と比べる")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"知らない版です: {', '.join(sorted(unknown))}")
+
+    results = run(args.sizes, args.variants, args.timeout, args.legacy_max_rows,
+                  not args.no_memory, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "seed": args.seed,
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"結果を {args.out} に書きました")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f)["results"], results)
+
+
+if __name__ == "__main__":
+    main()
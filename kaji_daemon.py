@@ -0,0 +1,505 @@
+"""DB ファイルを1プロセスだけで持つ書き込み係（daemon）と、そのクライアント。
+
+    python kaji_daemon.py --socket kaji.sock
+    KAJI_DAEMON_SOCKET=kaji.sock streamlit run Kaji.py   （何プロセスでも）
+
+Streamlit をプロキシの後ろに何プロセスも並べると、全員が同じ kaji.db の
+ファイルロックを取り合う。daemon を立てておくと、登録・削除・一覧・集計は
+Unix ドメインソケット越しに daemon に頼み、DB を開いて書くのは daemon だけに
+なる。同時に来た登録は daemon が家庭ごとにまとめて1回でコミットする。
+KAJI_DAEMON_SOCKET を指定しなければ今まで通り各プロセスが直接ファイルを開く。
+
+プロトコルは「4バイトの長さ（ビッグエンディアン）+ UTF-8 の JSON」の1往復。
+    要求 {"op": "list_page", "household": "default", "args": [...], "kwargs": {...}}
+    応答 {"result": ...} または {"error": "...", "type": "ValueError"}
+DataFrame は {"__frame__": {列名: [値, ...]}}、Filters は
+{"__filters__": [date_from, date_to, persons, tasks]} の形で送る。
+CSV の書き出し（大きな読み取り）は各プロセスがファイルを直接読む。
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from kaji_api import BATCH_MAX, BATCH_WINDOW, InsertBatcher
+from kaji_db import DB_PATH, ConnectionPool, Filters, to_row
+from kaji_households import (
+    HOUSEHOLD_DIR, MAX_OPEN, HouseholdRegistry, household_path, validate_household
+)
+from kaji_export import export_csv, export_snapshot
+from kaji_import import ImportResult, import_rows, read_csv
+
+logger = logging.getLogger("kaji.daemon")
+
+SOCKET_PATH = "kaji.sock"
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+CLIENT_POOL_SIZE = 4  # 1プロセスあたりのソケット数
+CLIENT_TIMEOUT = 30.0  # 秒
+IMPORT_CHUNK = 5000  # 取り込みは1回の要求にこの行数まで載せる
+
+# daemon に頼める KajiRepository のメソッド
+READ_OPS = {
+    "list_all", "list_page", "list_between", "list_deleted", "search",
+    "totals_by_person", "totals_by_task", "persons", "rollup",
+}
+WRITE_OPS = {"insert_many", "apply_changes", "delete", "restore", "set_persons", "rebuild_rollups"}
+
+
+class DaemonError(Exception):
+    """daemon 側で起きた（ValueError 以外の）エラー"""
+
+
+# -------------------------
+# 送受信の形式
+# -------------------------
+def _default(value):
+    if isinstance(value, pd.DataFrame):
+        # 列ごとのリストで送る（行ごとより組み立ても読み込みも速い）
+        return {"__frame__": {str(c): value[c].tolist() for c in value.columns}}
+    if isinstance(value, Filters):
+        return {"__filters__": list(dataclasses.astuple(value))}
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy の数値
+        return value.item()
+    raise TypeError(f"送れない値です: {type(value).__name__}")
+
+
+def _object_hook(obj):
+    if "__frame__" in obj:
+        frame = obj["__frame__"]
+        # 0行だと列の型が分からないので、read_sql_query と同じ object にする
+        empty = not any(frame.values())
+        return pd.DataFrame(frame, dtype=object if empty else None)
+    if "__filters__" in obj:
+        return Filters.of(*obj["__filters__"])
+    return obj
+
+
+def encode(message):
+    body = json.dumps(message, ensure_ascii=False, default=_default).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise ValueError(f"1回に送れるのは {MAX_FRAME_BYTES} バイトまで")
+    return HEADER.pack(len(body)) + body
+
+
+def decode(body):
+    return json.loads(body.decode("utf-8"), object_hook=_object_hook)
+
+
+async def read_frame(reader):
+    """1通読む。相手が閉じていれば None"""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError("大きすぎる要求です")
+    return decode(await reader.readexactly(length))
+
+
+# -------------------------
+# daemon
+# -------------------------
+class GroupCommit(InsertBatcher):
+    """同時に来た登録を、家庭ごとに insert_many 1回（コミット1回）にまとめる。
+
+    キューに積むのは ((household, row), future)。家庭は flush のときに
+    registry から引く（待っている間に LRU から追い出されていてもよい）。
+    """
+
+    def __init__(self, registry, executor, max_batch=BATCH_MAX, window=BATCH_WINDOW):
+        super().__init__(None, executor, max_batch, window)
+        self.registry = registry
+
+    async def _flush(self, items):
+        by_household = {}
+        for (household, row), future in items:
+            by_household.setdefault(household, []).append((row, future))
+        loop = asyncio.get_running_loop()
+        for household, group in by_household.items():
+            try:
+                ids = await loop.run_in_executor(
+                    self.executor, self.registry.repository(household).insert_many,
+                    [row for row, _ in group]
+                )
+            except Exception as e:
+                if len(group) == 1:
+                    logger.exception("登録に失敗（%s）", household)
+                    if not group[0][1].done():
+                        group[0][1].set_exception(e)
+                    continue
+                # まとめて入らなければ1件ずつ入れて、失敗はその行の呼び出し元だけに返す
+                logger.warning("まとめて登録に失敗（%s, %d件）: %s。1件ずつ入れ直します",
+                               household, len(group), e)
+                for row, future in group:
+                    await self._flush([((household, row), future)])
+                continue
+            for (_, future), new_id in zip(group, ids):
+                if not future.done():
+                    future.set_result(new_id)
+
+
+class KajiDaemon:
+    def __init__(self, registry, workers=4, batch_max=BATCH_MAX, batch_window=BATCH_WINDOW):
+        self.registry = registry
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kaji-daemon")
+        self.committer = GroupCommit(registry, self.executor, batch_max, batch_window)
+        self.requests = 0
+
+    def _call(self, household, op, args, kwargs):
+        with self.registry.using(household) as entry:
+            if op == "import_rows":
+                return dataclasses.asdict(import_rows(entry.pool, *args, **kwargs))
+            if op == "write_stats":
+                return entry.write_stats()
+            return getattr(entry.repo, op)(*args, **kwargs)
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        household = validate_household(request.get("household"))
+        args = request.get("args") or []
+        kwargs = request.get("kwargs") or {}
+        if op == "insert":
+            # まとめる前に検証する（1件の不正な行で同じ組の登録を巻き込まない）
+            try:
+                row = to_row(*args)
+            except TypeError as e:
+                raise ValueError(f"insert の引数が違います: {e}")
+            return await self.committer.insert((household, row))
+        if op not in READ_OPS | WRITE_OPS | {"import_rows", "write_stats"}:
+            raise ValueError(f"知らない操作です: {op}")
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._call, household, op, args, kwargs
+        )
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except ValueError as e:
+                    writer.write(encode({"error": str(e), "type": "ValueError"}))
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                try:
+                    response = {"result": await self.dispatch(request)}
+                except ValueError as e:
+                    response = {"error": str(e), "type": "ValueError"}
+                except Exception as e:
+                    logger.exception("%s", request.get("op"))
+                    response = {"error": f"{type(e).__name__}: {e}", "type": type(e).__name__}
+                try:
+                    payload = encode(response)
+                except ValueError as e:  # 結果が大きすぎる
+                    payload = encode({"error": str(e), "type": "ValueError"})
+                writer.write(payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path):
+        self.committer.start()
+        server = await asyncio.start_unix_server(self.handle, socket_path)
+        os.chmod(socket_path, 0o660)  # 同じグループのプロセスからだけ使う
+        logger.info("kaji daemon: %s", socket_path)
+        # systemd などからの SIGTERM でも、保存待ちを書き切ってから止まる
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            await self.committer.stop()
+            self.executor.shutdown(wait=True)
+
+
+def remove_stale_socket(socket_path):
+    """前回のソケットファイルが残っていれば消す（動いている daemon がいればエラー）"""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"{socket_path} で daemon がもう動いています")
+    finally:
+        probe.close()
+
+
+# -------------------------
+# クライアント（Streamlit の各プロセスで使う）
+# -------------------------
+class DaemonClient:
+    """daemon へのソケットを size 本まで使い回す（1本で同時に1往復だけ）"""
+
+    def __init__(self, socket_path=SOCKET_PATH, size=CLIENT_POOL_SIZE, timeout=CLIENT_TIMEOUT):
+        if size < 1:
+            raise ValueError("size は 1 以上")
+        self.socket_path = socket_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open(), False
+                except OSError:
+                    self._opened -= 1
+                    raise
+        return self._idle.get(timeout=self.timeout), True
+
+    def _discard(self, sock):
+        sock.close()
+        with self._lock:
+            self._opened -= 1
+
+    def _roundtrip(self, sock, payload):
+        sock.sendall(payload)
+        header = self._recv_exactly(sock, HEADER.size)
+        (length,) = HEADER.unpack(header)
+        return decode(self._recv_exactly(sock, length))
+
+    @staticmethod
+    def _recv_exactly(sock, size):
+        chunks = []
+        while size:
+            chunk = sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("daemon が接続を閉じました")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def call(self, op, household, *args, **kwargs):
+        payload = encode({"op": op, "household": household, "args": args, "kwargs": kwargs})
+        sock, reused = self._acquire()
+        try:
+            response = self._roundtrip(sock, payload)
+        except OSError:
+            self._discard(sock)
+            # daemon を再起動した後などで、置いてあったソケットが切れていることがある。
+            # 読み取りだけは新しいソケットで1回やり直す（書き込みは二重になりうるのでしない）
+            if not (reused and op in READ_OPS):
+                raise
+            sock, _ = self._acquire()
+            try:
+                response = self._roundtrip(sock, payload)
+            except OSError:
+                self._discard(sock)
+                raise
+        self._idle.put(sock)
+        if "error" in response:
+            if response.get("type") == "ValueError":
+                raise ValueError(response["error"])
+            raise DaemonError(response["error"])
+        return response["result"]
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class RemoteRepository:
+    """KajiRepository と同じ呼び方で daemon に頼む（1家庭ぶん）。
+
+    pool は CSV などの書き出し用に、DB ファイルを直接読むためのもの。
+    """
+
+    def __init__(self, client, household, pool):
+        self.client = client
+        self.household = household
+        self.pool = pool
+
+    def _call(self, op, *args, **kwargs):
+        return self.client.call(op, self.household, *args, **kwargs)
+
+    def cached(self, key, compute):
+        # キャッシュは daemon 側にある
+        return compute()
+
+    def insert(self, date, task, person, minutes, note=""):
+        return self._call("insert", date, task, person, minutes, note)
+
+    def insert_many(self, rows):
+        return self._call("insert_many", [list(row) for row in rows])
+
+    def apply_changes(self, updates=(), deletes=()):
+        return tuple(self._call("apply_changes", list(updates), list(deletes)))
+
+    def delete(self, task_id):
+        return self._call("delete", task_id)
+
+    def restore(self, ids):
+        return self._call("restore", list(ids))
+
+    def list_deleted(self, *args):
+        return self._call("list_deleted", *args)
+
+    def list_all(self):
+        return self._call("list_all")
+
+    def list_page(self, *args, **kwargs):
+        df, has_more = self._call("list_page", *args, **kwargs)
+        return df, has_more
+
+    def list_between(self, date_from, date_to):
+        return self._call("list_between", date_from, date_to)
+
+    def search(self, *args):
+        df, has_more = self._call("search", *args)
+        return df, has_more
+
+    def totals_by_person(self):
+        return self._call("totals_by_person")
+
+    def totals_by_task(self):
+        return self._call("totals_by_task")
+
+    def persons(self):
+        return self._call("persons")
+
+    def set_persons(self, names):
+        return self._call("set_persons", list(names))
+
+    def rollup(self, *args, **kwargs):
+        return self._call("rollup", *args, **kwargs)
+
+    def rebuild_rollups(self):
+        return self._call("rebuild_rollups")
+
+
+class RemoteHousehold:
+    """kaji_households.Household の daemon 版"""
+
+    def __init__(self, client, household, path):
+        self.id = household
+        self.path = path
+        self.pool = ConnectionPool(path, size=1, bootstrap=False)
+        self.repo = RemoteRepository(client, household, self.pool)
+        self.write_behind = None  # まとめてコミットするのは daemon 側
+        self.client = client
+
+    def import_csv(self, source, compression="infer"):
+        df, invalid = read_csv(source, compression)
+        result = ImportResult(invalid=invalid)
+        for start in range(0, len(df), IMPORT_CHUNK):
+            chunk = self.client.call("import_rows", self.id, df.iloc[start:start + IMPORT_CHUNK])
+            result.inserted += chunk["inserted"]
+            result.duplicates += chunk["duplicates"]
+        return result
+
+    def export_csv(self, filters, gzip=False):
+        return export_csv(self.pool, filters.date_from, filters.date_to, filters.persons,
+                          gzip=gzip, tasks=filters.tasks)
+
+    def export_snapshot(self, since_id=0, fmt="arrow"):
+        return export_snapshot(self.pool, since_id, fmt)
+
+    def write_stats(self):
+        return self.client.call("write_stats", self.id)
+
+    def close(self):
+        self.pool.close()
+
+
+class RemoteHouseholds(HouseholdRegistry):
+    """HouseholdRegistry の daemon 版。開くのは書き出し用の読み取り接続だけ"""
+
+    def __init__(self, socket_path=SOCKET_PATH, base_dir=HOUSEHOLD_DIR, default_path=DB_PATH,
+                 max_open=MAX_OPEN, client_size=CLIENT_POOL_SIZE):
+        super().__init__(base_dir, default_path, max_open)
+        self.client = DaemonClient(socket_path, client_size)
+
+    def _open_entry(self, household):
+        path = household_path(household, self.base_dir, self.default_path)
+        return RemoteHousehold(self.client, household, path)
+
+    def close(self):
+        super().close()
+        self.client.close()
+
+
+def main(argv=None):
+    from kaji_fanout import household_files
+    from kaji_maintenance import INTERVAL, MaintenanceJob
+
+    parser = argparse.ArgumentParser(description="kaji.db を1プロセスで持つ daemon")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix ドメインソケットのパス")
+    parser.add_argument("--db", default=DB_PATH, help="default 家庭の DB")
+    parser.add_argument("--dir", default=HOUSEHOLD_DIR, help="家庭ごとの DB があるディレクトリ")
+    parser.add_argument("--workers", type=int, default=4, help="SQLite 用のスレッド数")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN, help="同時に開く家庭の数")
+    parser.add_argument("--batch-max", type=int, default=BATCH_MAX)
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW,
+                        help="登録をまとめる時間窓 [秒]")
+    parser.add_argument("--maintenance-interval", type=float, default=INTERVAL,
+                        help="削除済みの行の片付けの間隔 [秒]（0 なら動かさない）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    remove_stale_socket(args.socket)
+    registry = HouseholdRegistry(args.dir, args.db, args.max_open, pool_size=args.workers)
+    maintenance = None
+    if args.maintenance_interval > 0:
+        maintenance = MaintenanceJob(
+            lambda: household_files(args.dir, args.db), args.maintenance_interval, registry
+        ).start()
+    daemon = KajiDaemon(registry, args.workers, args.batch_max, args.batch_window)
+    try:
+        asyncio.run(daemon.serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if maintenance is not None:
+            maintenance.stop()
+        registry.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
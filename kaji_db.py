@@ -0,0 +1,1153 @@
+import logging
+import queue
+import random
+import sys
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import kaji_metrics
+
+# -------------------------
+# DB設定
+# -------------------------
+DB_PATH = "kaji.db"
+POOL_SIZE = 4
+BUSY_TIMEOUT_MS = 5000
+SYNCHRONOUS = "NORMAL"  # WAL なら NORMAL で十分。停電対策を優先するなら FULL
+STATEMENT_CACHE_SIZE = 64
+PAGE_SIZE = 20
+DEFAULT_PERSONS = ["Pi", "Mi"]
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+WRITE_RETRIES = 5  # busy_timeout を待ってもなお SQLITE_BUSY のときのやり直し回数
+WRITE_BACKOFF = 0.05  # 秒。やり直すたびに倍（±50% ゆらす）
+WRITE_BACKOFF_MAX = 2.0
+LOCK_WAIT_THRESHOLD = 0.001  # 秒。これより長く待ったら「待った」と数える
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+logger = logging.getLogger("kaji.db")
+
+
+def connect(path=DB_PATH, synchronous=SYNCHRONOUS, busy_timeout_ms=BUSY_TIMEOUT_MS):
+    """WAL・busy_timeout・synchronous を設定した接続を返す"""
+    synchronous = synchronous.upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"synchronous は {SYNCHRONOUS_LEVELS} のどれか: {synchronous}")
+
+    # Streamlit はセッションごとに別スレッドで動くので check_same_thread は外す
+    conn = sqlite3.connect(
+        path,
+        timeout=busy_timeout_ms / 1000,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    # 新しい DB は空きページを少しずつ返せるようにしておく。WAL にする前・表を
+    # 作る前にしか効かない（既存の DB は kaji_admin.py enable-incremental-vacuum で）
+    if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    if kaji_metrics.enabled():
+        conn.set_trace_callback(kaji_metrics.trace_statement)
+    return conn
+
+
+# -------------------------
+# スキーマのマイグレーション（PRAGMA user_version で版を管理）
+# -------------------------
+def _migrate_v1(conn):
+    """time TEXT（"15分"）を minutes INTEGER に、date を YYYY-MM-DD に揃える"""
+    # 新規DBも旧DBと同じ道を通るように、まず旧形式のテーブルを用意する
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS kaji (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        task TEXT,
+        person TEXT,
+        time TEXT
+    )
+    """)
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'kaji'").fetchone()
+    seq = row[0] if row else 0
+    # ごく初期の版で作った DB には time 列がないので、そのときは 0 分にする
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(kaji)")}
+    time_expr = "time" if "time" in columns else "'0'"
+
+    conn.execute("""
+    CREATE TABLE kaji_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        task TEXT NOT NULL,
+        person TEXT NOT NULL,
+        minutes INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute(f"""
+    INSERT INTO kaji_new (id, date, task, person, minutes)
+    SELECT id,
+           COALESCE(date(date), date, ''),
+           COALESCE(task, ''),
+           COALESCE(person, ''),
+           CAST(TRIM(REPLACE(COALESCE({time_expr}, '0'), '分', '')) AS INTEGER)
+    FROM kaji
+    """)
+    conn.execute("DROP TABLE kaji")
+    conn.execute("ALTER TABLE kaji_new RENAME TO kaji")
+    # 削除済みの id を再利用しないよう AUTOINCREMENT の続き番号を引き継ぐ
+    conn.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'kaji'", (seq,)
+    )
+
+
+def _migrate_v2(conn):
+    """一覧・期間絞り込み・担当者別/家事別の集計に効く複合インデックス"""
+    # 期間で絞って担当者・家事ごとに集計しても表を読まずに済むよう minutes まで含める
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_kaji_date
+    ON kaji (date, person, task, minutes)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_kaji_person
+    ON kaji (person, date, minutes)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_kaji_task
+    ON kaji (task, date, minutes)
+    """)
+    conn.execute("ANALYZE")
+
+
+# -------------------------
+# 集計テーブル（日・週・月 × 担当者 × 家事）
+# kaji の INSERT / DELETE / UPDATE をトリガーで拾って常に最新に保つ
+# -------------------------
+ROLLUP_PERIODS = {
+    # period: 行の date から bucket を作る式（{d} に date 列が入る）
+    "day": "{d}",
+    "week": "date({d}, '-6 days', 'weekday 1')",  # その週の月曜日
+    "month": "substr({d}, 1, 7)",
+}
+
+
+def _rollup_add_sql(row, sign, live_only=False):
+    """row（NEW / OLD）の分を集計テーブルに足す（sign=-1 なら引く）SQL
+
+    live_only=True なら row が削除済み（deleted_at あり）のときは何もしない。
+    """
+    statements = []
+    for period, expr in ROLLUP_PERIODS.items():
+        bucket = expr.format(d=f"{row}.date")
+        statements.append(f"""
+        INSERT INTO kaji_rollup (period, bucket, person, task, minutes, count)
+        SELECT '{period}', {bucket}, {row}.person, {row}.task,
+               {sign} * {row}.minutes, {sign}
+        WHERE {f"{row}.deleted_at IS NULL" if live_only else "true"}
+        ON CONFLICT (period, bucket, person, task) DO UPDATE
+        SET minutes = minutes + excluded.minutes,
+            count = count + excluded.count;""")
+        if sign < 0:
+            # 件数が0になったバケツは消しておく（読むバケツ数を増やさないため）
+            statements.append(f"""
+        DELETE FROM kaji_rollup
+        WHERE period = '{period}' AND bucket = {bucket}
+          AND person = {row}.person AND task = {row}.task AND count <= 0;""")
+    return "".join(statements)
+
+
+def rebuild_rollups(conn, live_only=True):
+    """集計テーブルを kaji から作り直す（バックフィルや不整合の修復用）
+
+    live_only=False は deleted_at 列ができる前（v3 の移行中）に使う。
+    """
+    conn.execute("DELETE FROM kaji_rollup")
+    for period, expr in ROLLUP_PERIODS.items():
+        bucket = expr.format(d="date")
+        conn.execute(f"""
+        INSERT INTO kaji_rollup (period, bucket, person, task, minutes, count)
+        SELECT '{period}', {bucket}, person, task, SUM(minutes), COUNT(*)
+        FROM kaji
+        {"WHERE deleted_at IS NULL" if live_only else ""}
+        GROUP BY 2, 3, 4
+        """)
+
+
+def _migrate_v3(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS kaji_rollup (
+        period TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        person TEXT NOT NULL,
+        task TEXT NOT NULL,
+        minutes INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (period, bucket, person, task)
+    ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS kaji_rollup_ai AFTER INSERT ON kaji BEGIN
+    {_rollup_add_sql("NEW", 1)}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS kaji_rollup_ad AFTER DELETE ON kaji BEGIN
+    {_rollup_add_sql("OLD", -1)}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS kaji_rollup_au
+    AFTER UPDATE OF date, task, person, minutes ON kaji BEGIN
+    {_rollup_add_sql("OLD", -1)}
+    {_rollup_add_sql("NEW", 1)}
+    END
+    """)
+    rebuild_rollups(conn, live_only=False)
+
+
+def _migrate_v4(conn):
+    """家庭ごとの担当者の一覧"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS kaji_person (
+        name TEXT PRIMARY KEY,
+        sort INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+
+
+# -------------------------
+# 全文検索（FTS5）
+# kaji を外部コンテンツにした索引で、本文は持たずトリガーで索引だけ更新する。
+# 日本語は単語で区切れないので trigram（3文字ずつ）で索引を作る
+# -------------------------
+FTS_COLUMNS = ("task", "person", "note")
+
+
+def _fts_sql(row, command=None, live_only=False):
+    """row（NEW / OLD）を索引に入れる（command="delete" なら外す）SQL
+
+    live_only=True なら row が削除済み（deleted_at あり）のときは何もしない。
+    """
+    columns = ", ".join(FTS_COLUMNS)
+    values = ", ".join(f"{row}.{c}" for c in FTS_COLUMNS)
+    if live_only:
+        values += f" WHERE {row}.deleted_at IS NULL"
+    if command is None:
+        return f"INSERT INTO kaji_fts (rowid, {columns}) SELECT {row}.id, {values};"
+    return (f"INSERT INTO kaji_fts (kaji_fts, rowid, {columns}) "
+            f"SELECT '{command}', {row}.id, {values};")
+
+
+def rebuild_fts(conn):
+    """検索の索引を kaji から作り直す"""
+    conn.execute("INSERT INTO kaji_fts (kaji_fts) VALUES ('rebuild')")
+
+
+def _migrate_v5(conn):
+    """メモ列と全文検索の索引"""
+    conn.execute("ALTER TABLE kaji ADD COLUMN note TEXT NOT NULL DEFAULT ''")
+    conn.execute(f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS kaji_fts USING fts5(
+        {", ".join(FTS_COLUMNS)},
+        content='kaji', content_rowid='id', tokenize='trigram'
+    )
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS kaji_fts_ai AFTER INSERT ON kaji BEGIN
+    {_fts_sql("NEW")}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS kaji_fts_ad AFTER DELETE ON kaji BEGIN
+    {_fts_sql("OLD", "delete")}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS kaji_fts_au
+    AFTER UPDATE OF {", ".join(FTS_COLUMNS)} ON kaji BEGIN
+    {_fts_sql("OLD", "delete")}
+    {_fts_sql("NEW")}
+    END
+    """)
+    rebuild_fts(conn)
+
+
+# -------------------------
+# 論理削除（削除は deleted_at に UNIX 秒を入れるだけ。保存期間のあいだは
+# 元に戻せて、過ぎた行は kaji_maintenance がまとめて消す）
+# 集計テーブルと検索の索引には生きている行（deleted_at IS NULL）だけを入れる
+# -------------------------
+LIVE_INDEXES = {
+    # v2 のインデックスを生きている行だけの部分インデックスにしたもの。
+    # 末尾の deleted_at（常に NULL）は、条件に出てくる列も含めておかないと
+    # カバリングインデックスとして使われないため
+    "idx_kaji_date": "date, person, task, minutes, deleted_at",
+    "idx_kaji_person": "person, date, minutes, deleted_at",
+    "idx_kaji_task": "task, date, minutes, deleted_at",
+}
+
+
+def _migrate_v6(conn):
+    conn.execute("ALTER TABLE kaji ADD COLUMN deleted_at INTEGER")
+
+    # 部分インデックスは WHERE deleted_at IS NULL を含むクエリで使われ、
+    # 削除済みの行のぶん小さいままになる
+    for name, columns in LIVE_INDEXES.items():
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute(f"CREATE INDEX {name} ON kaji ({columns}) WHERE deleted_at IS NULL")
+    # 保存期間を過ぎた行を探す用（削除済みの行だけ）
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_kaji_deleted
+    ON kaji (deleted_at) WHERE deleted_at IS NOT NULL
+    """)
+
+    # トリガーは「生きている行が増えた・減った」ときだけ集計と索引に反映する。
+    # 論理削除（NULL → 時刻）は引く、取り消し（時刻 → NULL）は足す、
+    # 保存期間後の物理削除は削除済みの行なので何もしない
+    for name in ("kaji_rollup_ai", "kaji_rollup_ad", "kaji_rollup_au",
+                 "kaji_fts_ai", "kaji_fts_ad", "kaji_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(f"""
+    CREATE TRIGGER kaji_rollup_ai AFTER INSERT ON kaji BEGIN
+    {_rollup_add_sql("NEW", 1, live_only=True)}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER kaji_rollup_ad AFTER DELETE ON kaji BEGIN
+    {_rollup_add_sql("OLD", -1, live_only=True)}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER kaji_rollup_au
+    AFTER UPDATE OF date, task, person, minutes, deleted_at ON kaji BEGIN
+    {_rollup_add_sql("OLD", -1, live_only=True)}
+    {_rollup_add_sql("NEW", 1, live_only=True)}
+    END
+    """)
+
+    # 検索の索引は生きている行のビューを外部コンテンツにして作り直す
+    # （'rebuild' でも削除済みの行が入らないように）
+    conn.execute("DROP TABLE IF EXISTS kaji_fts")
+    conn.execute(f"""
+    CREATE VIEW IF NOT EXISTS kaji_live AS
+    SELECT id, {", ".join(FTS_COLUMNS)} FROM kaji WHERE deleted_at IS NULL
+    """)
+    conn.execute(f"""
+    CREATE VIRTUAL TABLE kaji_fts USING fts5(
+        {", ".join(FTS_COLUMNS)},
+        content='kaji_live', content_rowid='id', tokenize='trigram'
+    )
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER kaji_fts_ai AFTER INSERT ON kaji BEGIN
+    {_fts_sql("NEW", live_only=True)}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER kaji_fts_ad AFTER DELETE ON kaji BEGIN
+    {_fts_sql("OLD", "delete", live_only=True)}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER kaji_fts_au
+    AFTER UPDATE OF {", ".join(FTS_COLUMNS)}, deleted_at ON kaji BEGIN
+    {_fts_sql("OLD", "delete", live_only=True)}
+    {_fts_sql("NEW", live_only=True)}
+    END
+    """)
+    rebuild_fts(conn)
+    conn.execute("ANALYZE")
+
+
+MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """未適用のマイグレーションを順に当てて、適用後の版を返す"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in MIGRATIONS:
+        if version >= target:
+            continue
+        # 複数プロセスが同時に起動しても1回だけ当たるよう書き込みロックを取って再確認
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < target:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                version = target
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return version
+
+
+def ensure_schema(conn):
+    return migrate(conn)
+
+
+def to_date_key(value):
+    """date / datetime / 文字列を 'YYYY-MM-DD' に揃える（辞書順 = 日付順）"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+
+def to_row(date, task, person, minutes, note=""):
+    """登録する1行を (date, task, person, minutes, note) に揃える"""
+    return (to_date_key(date), task, person, int(minutes), (note or "").strip())
+
+
+# -------------------------
+# 一覧・CSV・集計で共通の絞り込み
+# pandas で全件から絞るのではなく、インデックスの効く WHERE 句にして SQL に渡す
+# -------------------------
+@dataclass(frozen=True)
+class Filters:
+    """期間（両端含む）・担当者・家事の絞り込み。何も指定しなければ全件"""
+
+    date_from: str = None
+    date_to: str = None
+    persons: tuple = ()
+    tasks: tuple = ()
+
+    @classmethod
+    def of(cls, date_from=None, date_to=None, persons=None, tasks=None):
+        """日付は date でも文字列でもよい。キャッシュのキーに使えるよう tuple に揃える"""
+        return cls(
+            to_date_key(date_from) if date_from else None,
+            to_date_key(date_to) if date_to else None,
+            tuple(persons or ()),
+            tuple(tasks or ()),
+        )
+
+    def __bool__(self):
+        return bool(self.date_from or self.date_to or self.persons or self.tasks)
+
+    def where(self, date_column="date", date_from=None, date_to=None, newest_first=False):
+        """(条件のリスト, パラメータのリスト) を返す。呼び出し側で AND でつなぐ
+
+        newest_first=True は id の降順に LIMIT 件だけ読むとき用。期間の指定が
+        なければ担当者・家事のインデックスを使わせず（+列）、id の降順に辿って
+        条件で落とす。インデックスを使うと一致する全行を並べ替えることになり、
+        "Pi" のように半分の行が一致する条件で1ページ目が遅くなるため。
+        """
+        date_from = self.date_from if date_from is None else date_from
+        date_to = self.date_to if date_to is None else date_to
+        prefix = "+" if newest_first and not (date_from or date_to) else ""
+        conditions = []
+        params = []
+        if date_from:
+            conditions.append(f"{date_column} >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append(f"{date_column} <= ?")
+            params.append(date_to)
+        for column, values in (("person", self.persons), ("task", self.tasks)):
+            if values:
+                conditions.append(f"{prefix}{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        return conditions, params
+
+    def bucket_range(self, period):
+        """集計テーブル用に期間を bucket の範囲にする（端の週・月はまるごと入る）"""
+        return (bucket_of(period, self.date_from) if self.date_from else None,
+                bucket_of(period, self.date_to) if self.date_to else None)
+
+
+def bucket_of(period, value):
+    """ROLLUP_PERIODS の式と同じ bucket を Python 側で作る"""
+    key = to_date_key(value)
+    if period == "week":
+        day = date.fromisoformat(key)
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if period == "month":
+        return key[:7]
+    return key
+
+
+NO_FILTERS = Filters()
+
+
+# -------------------------
+# 検索語の組み立て
+# -------------------------
+SEARCH_MIN_CHARS = 3  # trigram の索引が効くのは3文字から
+
+
+def parse_search(text):
+    """検索語を (MATCH 式, LIKE パターンのリスト) に分ける。
+
+    空白区切りの語はすべて含む（AND）。3文字以上の語は FTS5 の MATCH に、
+    それより短い語（"カビ" など）は LIKE にする。
+    """
+    phrases = []
+    patterns = []
+    for term in text.split():
+        if len(term) >= SEARCH_MIN_CHARS:
+            # 記号が演算子として解釈されないよう必ずフレーズ（"..."）にする
+            phrases.append('"' + term.replace('"', '""') + '"')
+        else:
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            patterns.append(f"%{escaped}%")
+    return " AND ".join(phrases), patterns
+
+
+# -------------------------
+# コネクションプール
+# 読み取りはスレッドごとに別の接続（使う間だけ借りる）で WAL のスナップショットを
+# 並行に読み、書き込みは1本の接続をロックで順番に使う。別プロセスとの競合で
+# SQLITE_BUSY になったら少し待ってやり直す
+# -------------------------
+class WriteStats:
+    """書き込みの回数とロック待ちの時間（プロセス内のロック・SQLite のロック）"""
+
+    def __init__(self):
+        self.writes = 0
+        self.lock_waits = 0  # プロセス内で他の書き込みを待った回数
+        self.lock_wait_seconds = 0.0
+        self.max_lock_wait = 0.0
+        self.sqlite_wait_seconds = 0.0  # BEGIN IMMEDIATE で他プロセスを待った時間
+        self.busy_retries = 0
+        self.busy_errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, lock_wait, sqlite_wait):
+        with self._lock:
+            self.writes += 1
+            if lock_wait > LOCK_WAIT_THRESHOLD:
+                self.lock_waits += 1
+            self.lock_wait_seconds += lock_wait
+            self.max_lock_wait = max(self.max_lock_wait, lock_wait)
+            self.sqlite_wait_seconds += sqlite_wait
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "writes": self.writes,
+                "lock_waits": self.lock_waits,
+                "lock_wait_seconds": round(self.lock_wait_seconds, 6),
+                "max_lock_wait": round(self.max_lock_wait, 6),
+                "sqlite_wait_seconds": round(self.sqlite_wait_seconds, 6),
+                "busy_retries": self.busy_retries,
+                "busy_errors": self.busy_errors,
+            }
+
+
+def _is_busy(error):
+    return isinstance(error, sqlite3.OperationalError) and kaji_metrics.is_busy_error(error)
+
+
+class ConnectionPool:
+    """プロセス全体で使い回す SQLite 接続のプール。
+
+    - reader(): 読み取り用。size 本までの接続を使う間だけスレッドに貸す
+      （同じ接続を同時に2つのスレッドが使うことはない）
+    - write(fn): 書き込み用。1本の書き込み接続をロックで順番に使い、
+      BEGIN IMMEDIATE 〜 COMMIT の中で fn(conn) を呼ぶ。SQLITE_BUSY なら
+      バックオフしながら retries 回までやり直す（fn は何度呼ばれてもよいこと）
+    """
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE,
+                 synchronous=SYNCHRONOUS, busy_timeout_ms=BUSY_TIMEOUT_MS, bootstrap=True,
+                 retries=WRITE_RETRIES):
+        if size < 1:
+            raise ValueError("size は 1 以上")
+        self.path = path
+        self.size = size
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.retries = retries
+        self.stats = WriteStats()
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        # スキーマ作成はプール作成時の1回だけ（済んでいると分かっていれば省く）
+        if bootstrap:
+            conn = self._open()
+            ensure_schema(conn)
+            self._idle.put(conn)
+
+    def _open(self):
+        conn = connect(self.path, self.synchronous, self.busy_timeout_ms)
+        self._opened += 1
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                return self._open()
+        # 上限まで開いているので空くのを待つ
+        return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+
+    @contextmanager
+    def reader(self):
+        """読み取り用の接続を借りる"""
+        if self._closed:
+            raise RuntimeError("プールは閉じられています")
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if self._closed:
+                # 使っている間にプールが閉じられたら、返さずに閉じる
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    # 今までの呼び出し（読み取り）はそのまま使える
+    connection = reader
+
+    @contextmanager
+    def writer(self):
+        """書き込み接続をロックを取って借りる（トランザクションは呼び出し側で。
+        VACUUM のようにトランザクションの外で流すもの用。普段は write() を使う）"""
+        if self._closed:
+            raise RuntimeError("プールは閉じられています")
+        started = time.perf_counter()
+        with self._write_lock:
+            waited = time.perf_counter() - started
+            kaji_metrics.LOCK_WAIT.observe(waited, "thread")
+            if self._writer is None:
+                self._writer = connect(self.path, self.synchronous, self.busy_timeout_ms)
+            try:
+                yield self._writer
+            except Exception:
+                self._writer.rollback()
+                raise
+            finally:
+                if self._closed:
+                    self._writer.close()
+                    self._writer = None
+            self.stats.record(waited, 0.0)
+
+    def write(self, fn):
+        """fn(conn) を1トランザクションで実行してコミットし、fn の戻り値を返す"""
+        if self._closed:
+            raise RuntimeError("プールは閉じられています")
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            with self._write_lock:
+                lock_wait = time.perf_counter() - started
+                kaji_metrics.LOCK_WAIT.observe(lock_wait, "thread")
+                if self._writer is None:
+                    self._writer = connect(self.path, self.synchronous, self.busy_timeout_ms)
+                conn = self._writer
+                begun = time.perf_counter()
+                try:
+                    # 書き込みロックは最初に取る（途中で読み取りから昇格すると
+                    # busy_timeout が効かずにすぐ失敗することがあるため）
+                    conn.execute("BEGIN IMMEDIATE")
+                    sqlite_wait = time.perf_counter() - begun
+                    kaji_metrics.LOCK_WAIT.observe(sqlite_wait, "sqlite")
+                    result = fn(conn)
+                    conn.commit()
+                except Exception as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    if not _is_busy(e) or attempt == self.retries:
+                        if _is_busy(e):
+                            with self.stats._lock:
+                                self.stats.busy_errors += 1
+                        raise
+                    busy = e
+                else:
+                    self.stats.record(lock_wait, sqlite_wait)
+                    return result
+                finally:
+                    if self._closed and self._writer is not None:
+                        self._writer.close()
+                        self._writer = None
+            # ロックを放してから待つ（他のスレッドの書き込みは先に進めてよい）
+            with self.stats._lock:
+                self.stats.busy_retries += 1
+            kaji_metrics.SQLITE_BUSY.inc("retry")
+            delay = min(WRITE_BACKOFF_MAX, WRITE_BACKOFF * 2 ** attempt)
+            logger.warning("書き込みが競合（%d回目）: %s。%.3f秒後にやり直します",
+                           attempt + 1, busy, delay)
+            time.sleep(delay * (0.5 + random.random()))
+
+    def close(self):
+        """空いている接続を閉じる。使用中の接続は返ってきたときに閉じる"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        if self._write_lock.acquire(blocking=False):
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            finally:
+                self._write_lock.release()
+
+
+# -------------------------
+# クエリ結果キャッシュ
+# -------------------------
+def _size_of(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, tuple):
+        return sum(_size_of(v) for v in value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """全セッションで共有する LRU のクエリ結果キャッシュ。
+
+    DB が変わったかどうかは専用の接続で PRAGMA data_version を見て判断する。
+    data_version は「他の接続」がコミットすると変わるので、プールの接続や
+    別プロセスからの書き込みもすぐに反映される。返した値は共有なので、
+    呼び出し側で書き換えないこと。
+    """
+
+    def __init__(self, path=DB_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._probe = sqlite3.connect(path, check_same_thread=False)
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._version = None
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _current_version(self):
+        return (self._probe.execute("PRAGMA data_version").fetchone()[0], self._writes)
+
+    def invalidate(self):
+        """このプロセス内の書き込みを確実に反映させたいときに呼ぶ"""
+        with self._lock:
+            self._writes += 1
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            version = self._current_version()
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # 計算中はロックを持たない（遅いクエリで他のセッションを待たせない）
+        value = compute()
+        size = _size_of(value)
+
+        with self._lock:
+            # 計算している間に書き込みがあったら、古いかもしれないので入れない
+            if self._current_version() != version or size > self.max_bytes:
+                return value
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self._probe.close()
+
+
+# -------------------------
+# 一覧の編集（編集前後の表の差分）
+# -------------------------
+LIST_COLUMNS = ["id", "date", "task", "person", "minutes", "time", "note"]
+EDIT_COLUMNS = ["date", "task", "person", "minutes", "note"]
+
+
+def _edit_values(df):
+    if df[["date", "task", "person", "minutes"]].isna().any(axis=None):
+        raise ValueError("日付・家事・担当・時間は空にできません")
+    minutes = pd.to_numeric(df["minutes"])
+    if (minutes < 0).any() or (minutes != minutes.round()).any():
+        raise ValueError("時間は0以上の整数（分）")
+    return pd.DataFrame({
+        "date": df["date"].map(to_date_key),
+        "task": df["task"].astype(str).str.strip(),
+        "person": df["person"].astype(str).str.strip(),
+        "minutes": minutes.astype("int64"),
+        "note": df["note"].fillna("").astype(str).str.strip(),
+    }, index=df.index)
+
+
+def diff_page(before, after, delete_column="delete"):
+    """編集前後の一覧（id で対応させる）から (updates, deletes) を作る。
+
+    updates は KajiRepository.apply_changes に渡す (id, date, task, person,
+    minutes, note) のリスト、deletes は after の delete_column が真の行の id。
+    削除する行の編集は捨てる。
+    """
+    after = after.set_index("id")
+    deleted = after[delete_column].fillna(False).astype(bool)
+    kept = after.index[~deleted]
+    new = _edit_values(after.loc[kept])
+    old = _edit_values(before.set_index("id").loc[kept])
+    changed = (new != old).any(axis=1)
+    updates = list(new[changed].itertuples(name=None))
+    deletes = [int(i) for i in after.index[deleted]]
+    return updates, deletes
+
+
+# -------------------------
+# kaji テーブルの操作
+# -------------------------
+class KajiRepository:
+    """kaji テーブルへの登録・削除・一覧・集計をまとめたもの"""
+
+    # SQL は定数にしておくと sqlite3 の文キャッシュにそのまま乗る
+    INSERT_SQL = "INSERT INTO kaji (date, task, person, minutes, note) VALUES (?, ?, ?, ?, ?)"
+    UPDATE_SQL = ("UPDATE kaji SET date = ?, task = ?, person = ?, minutes = ?, note = ? "
+                  "WHERE id = ? AND deleted_at IS NULL")
+    # 削除は論理削除（deleted_at を入れる）。保存期間内なら RESTORE_SQL で戻せる
+    DELETE_SQL = "UPDATE kaji SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL"
+    RESTORE_SQL = "UPDATE kaji SET deleted_at = NULL WHERE id = ? AND deleted_at IS NOT NULL"
+    # 画面と CSV では今まで通り "15分" の形で見せる（minutes は編集用）
+    COLUMNS = "id, date, task, person, minutes, minutes || '分' AS time, note"
+    # 読むのは生きている行だけ。部分インデックスを使わせるため条件は必ずこの形で書く
+    LIVE = "deleted_at IS NULL"
+    LIST_SQL = f"SELECT {COLUMNS} FROM kaji WHERE {LIVE} ORDER BY id DESC"
+    # キーセットページング（OFFSET は読み飛ばす行数だけ遅くなるので使わない）
+    PAGE_FIRST_SQL = f"SELECT {COLUMNS} FROM kaji WHERE {LIVE} ORDER BY id DESC LIMIT ?"
+    PAGE_AFTER_SQL = (f"SELECT {COLUMNS} FROM kaji WHERE {LIVE} AND id < ? "
+                      "ORDER BY id DESC LIMIT ?")
+    RANGE_SQL = (f"SELECT {COLUMNS} FROM kaji "
+                 f"WHERE {LIVE} AND date BETWEEN ? AND ? ORDER BY date DESC, id DESC")
+    TOTAL_SQL = f"""
+    SELECT person, COUNT(*) AS count, SUM(minutes) AS minutes
+    FROM kaji
+    WHERE {LIVE}
+    GROUP BY person
+    ORDER BY person
+    """
+    TOTAL_BY_TASK_SQL = f"""
+    SELECT task, COUNT(*) AS count, SUM(minutes) AS minutes
+    FROM kaji
+    WHERE {LIVE}
+    GROUP BY task
+    ORDER BY minutes DESC
+    """
+    # 削除済み（まだ元に戻せる）の行。新しく消した順
+    DELETED_SQL = (f"SELECT {COLUMNS}, deleted_at FROM kaji WHERE deleted_at IS NOT NULL "
+                   "ORDER BY deleted_at DESC, id DESC LIMIT ?")
+
+    # 絞り込みあり。条件は Filters.where() で作る
+    PAGE_FILTERED_SQL = (f"SELECT {COLUMNS} FROM kaji WHERE {LIVE} AND {{where}} "
+                         "ORDER BY id DESC LIMIT ?")
+
+    # 集計テーブルは (period, bucket, ...) が主キーなのでバケツ数ぶんしか読まない
+    ROLLUP_SQL = """
+    SELECT bucket, {group}, SUM(minutes) AS minutes, SUM(count) AS count
+    FROM kaji_rollup
+    WHERE period = ? AND bucket >= ?{where}
+    GROUP BY bucket, {group}
+    ORDER BY bucket
+    """
+
+    PERSONS_SQL = "SELECT name FROM kaji_person ORDER BY sort, name"
+
+    # 検索。MATCH があれば索引から bm25 の順位順（同点は新しい順）、
+    # 短い語だけなら新しい順に LIMIT 件見つかるまで辿る。
+    # 一致が多い語（"風呂掃除" など）で全件の順位を計算すると遅いので、
+    # 順位付けは新しい方から SEARCH_RANK_WINDOW 件の一致（短い語の条件も
+    # 満たすもの）の中だけで行い、それより古い一致はその後ろに新しい順で続ける
+    SEARCH_SHORT_WHERE = ("(k.task LIKE ? ESCAPE '\\' OR k.person LIKE ? ESCAPE '\\'"
+                          " OR k.note LIKE ? ESCAPE '\\')")
+    SEARCH_RANK_WINDOW = 1000
+    SEARCH_WINDOW_SQL = """
+    SELECT k.id FROM kaji_fts JOIN kaji AS k ON k.id = kaji_fts.rowid
+    WHERE kaji_fts MATCH ?{where}
+    ORDER BY kaji_fts.rowid DESC LIMIT ?
+    """
+    SEARCH_MATCH_SQL = """
+    SELECT k.id, k.date, k.task, k.person, k.minutes, k.minutes || '分' AS time, k.note
+    FROM kaji_fts JOIN kaji AS k ON k.id = kaji_fts.rowid
+    WHERE kaji_fts MATCH ? AND kaji_fts.rowid >= COALESCE((
+        SELECT MIN(id) FROM ({window})
+    ), 0){where}
+    ORDER BY kaji_fts.rank, k.id DESC
+    LIMIT ? OFFSET ?
+    """
+    SEARCH_WINDOW_EDGE_SQL = "SELECT COUNT(*) AS hits, MIN(id) AS floor FROM ({window})"
+    SEARCH_OLDER_SQL = """
+    SELECT k.id, k.date, k.task, k.person, k.minutes, k.minutes || '分' AS time, k.note
+    FROM kaji_fts JOIN kaji AS k ON k.id = kaji_fts.rowid
+    WHERE kaji_fts MATCH ? AND kaji_fts.rowid < ?{where}
+    ORDER BY kaji_fts.rowid DESC
+    LIMIT ? OFFSET ?
+    """
+    SEARCH_LIKE_SQL = """
+    SELECT k.id, k.date, k.task, k.person, k.minutes, k.minutes || '分' AS time, k.note
+    FROM kaji AS k
+    WHERE k.deleted_at IS NULL AND {where}
+    ORDER BY k.id DESC
+    LIMIT ? OFFSET ?
+    """
+
+    def __init__(self, pool, cache=None):
+        self.pool = pool
+        self.cache = cache
+
+    def cached(self, key, compute):
+        """キャッシュがあれば key で引き、なければ compute() の結果を返す"""
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(key, compute)
+
+    def _written(self):
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    def insert(self, date, task, person, minutes, note=""):
+        row = to_row(date, task, person, minutes, note)
+        with kaji_metrics.timed("insert"):
+            new_id = self.pool.write(lambda conn: conn.execute(self.INSERT_SQL, row).lastrowid)
+        self._written()
+        return new_id
+
+    def insert_many(self, rows):
+        """(date, task, person, minutes[, note]) の並びを1トランザクションで登録し、
+        id のリストを返す
+
+        コミット（fsync）は1回だけなので、まとめて来た登録はこちらで入れる。
+        """
+        rows = [to_row(*row) for row in rows]
+        if not rows:
+            return []
+        with kaji_metrics.timed("insert_many"):
+            ids = self.pool.write(
+                lambda conn: [conn.execute(self.INSERT_SQL, row).lastrowid for row in rows])
+        self._written()
+        return ids
+
+    def apply_changes(self, updates=(), deletes=()):
+        """一覧での編集・削除を1トランザクションでまとめて反映する。
+
+        updates は (id, date, task, person, minutes, note)、deletes は id の並び
+        （論理削除）。どちらも executemany で流すので、何件あってもコミットは1回。
+        戻り値は (更新した行数, 削除した行数)。
+        """
+        updates = [(*to_row(d, t, p, m, n), int(i)) for i, d, t, p, m, n in updates]
+        now = int(time.time())
+        deletes = [(now, int(i)) for i in deletes]
+        if not updates and not deletes:
+            return 0, 0
+        def apply(conn):
+            updated = conn.executemany(self.UPDATE_SQL, updates).rowcount if updates else 0
+            deleted = conn.executemany(self.DELETE_SQL, deletes).rowcount if deletes else 0
+            return updated, deleted
+
+        with kaji_metrics.timed("edit"):
+            counts = self.pool.write(apply)
+        self._written()
+        return counts
+
+    def delete(self, task_id):
+        """論理削除。保存期間のあいだは restore() で戻せる"""
+        params = (int(time.time()), int(task_id))
+        with kaji_metrics.timed("delete"):
+            deleted = self.pool.write(lambda conn: conn.execute(self.DELETE_SQL, params).rowcount)
+        self._written()
+        return deleted
+
+    def restore(self, ids):
+        """論理削除した行を元に戻し、戻した行数を返す（物理削除済みの行は戻らない）"""
+        ids = [(int(i),) for i in ids]
+        if not ids:
+            return 0
+        with kaji_metrics.timed("restore"):
+            restored = self.pool.write(
+                lambda conn: conn.executemany(self.RESTORE_SQL, ids).rowcount)
+        self._written()
+        return restored
+
+    def list_deleted(self, limit=PAGE_SIZE):
+        """元に戻せる（論理削除済みの）行を新しく消した順に返す"""
+        return self._cached_query(self.DELETED_SQL, (int(limit),))
+
+    def _query(self, sql, params=(), op="list"):
+        with kaji_metrics.timed(op), self.pool.reader() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        if kaji_metrics.current() is not None:
+            kaji_metrics.add_rows(len(df))
+        return df
+
+    def _cached_query(self, sql, params=(), op="list"):
+        params = tuple(params)
+        return self.cached(("query", sql, params), lambda: self._query(sql, params, op))
+
+    def list_all(self):
+        return self._cached_query(self.LIST_SQL)
+
+    def list_page(self, before_id=None, limit=PAGE_SIZE, filters=NO_FILTERS):
+        """id の降順で before_id より古い行を最大 limit 件返す。
+
+        戻り値は (DataFrame, 次ページがあるか)。次ページは df の最後の id を
+        before_id に渡して取る。filters（Filters）で絞り込める。
+        """
+        if limit < 1:
+            raise ValueError("limit は 1 以上")
+        # 1件多く読んで次ページの有無を判定する
+        df = self._cached_query(*self.page_query(before_id, limit + 1, filters))
+        has_more = len(df) > limit
+        return df.iloc[:limit], has_more
+
+    @classmethod
+    def page_query(cls, before_id=None, limit=PAGE_SIZE, filters=NO_FILTERS):
+        """list_page が流す (SQL, パラメータ)。check_query_plans からも使う"""
+        if filters:
+            conditions, params = filters.where(newest_first=True)
+            if before_id is not None:
+                conditions.append("id < ?")
+                params.append(int(before_id))
+            return cls.PAGE_FILTERED_SQL.format(where=" AND ".join(conditions)), (*params, limit)
+        if before_id is None:
+            return cls.PAGE_FIRST_SQL, (limit,)
+        return cls.PAGE_AFTER_SQL, (int(before_id), limit)
+
+    def list_between(self, date_from, date_to):
+        """date_from〜date_to（両端含む）の行を新しい日付順に返す"""
+        return self._cached_query(self.RANGE_SQL, (to_date_key(date_from), to_date_key(date_to)))
+
+    def search(self, text, limit=PAGE_SIZE, offset=0):
+        """task・person・note の全文検索。(DataFrame, 次ページがあるか) を返す
+
+        順位順なのでキーセットにはできず OFFSET で送る（深いページは読まない前提）。
+        """
+        if limit < 1:
+            raise ValueError("limit は 1 以上")
+        match, patterns = parse_search(text)
+        if not match and not patterns:
+            return pd.DataFrame(columns=LIST_COLUMNS), False
+        where = [self.SEARCH_SHORT_WHERE] * len(patterns)
+        params = [p for p in patterns for _ in range(3)]
+        if not match:
+            sql = self.SEARCH_LIKE_SQL.format(where=" AND ".join(where))
+            df = self._cached_query(sql, (*params, limit + 1, int(offset)), "search")
+            return df.iloc[:limit], len(df) > limit
+
+        where = "".join(f" AND {w}" for w in where)
+        window = self.SEARCH_WINDOW_SQL.format(where=where)
+        window_params = (match, *params, self.SEARCH_RANK_WINDOW)
+        sql = self.SEARCH_MATCH_SQL.format(window=window, where=where)
+        df = self._cached_query(
+            sql, (match, *window_params, *params, limit + 1, int(offset)), "search")
+        if len(df) <= limit:
+            # 順位を付けた分で足りなければ、それより古い一致を新しい順に足す
+            edge = self._cached_query(self.SEARCH_WINDOW_EDGE_SQL.format(window=window),
+                                      window_params, "search")
+            hits, floor = int(edge["hits"].iloc[0]), edge["floor"].iloc[0]
+            if hits >= self.SEARCH_RANK_WINDOW:
+                older = self._cached_query(
+                    self.SEARCH_OLDER_SQL.format(where=where),
+                    (match, int(floor), *params, limit + 1 - len(df), max(0, int(offset) - hits)),
+                    "search",
+                )
+                df = pd.concat([df, older], ignore_index=True) if len(df) else older
+        return df.iloc[:limit], len(df) > limit
+
+    def totals_by_person(self):
+        return self._cached_query(self.TOTAL_SQL, op="aggregate")
+
+    def totals_by_task(self):
+        return self._cached_query(self.TOTAL_BY_TASK_SQL, op="aggregate")
+
+    def persons(self):
+        """担当者の一覧（未設定なら DEFAULT_PERSONS）"""
+        names = self.cached(("persons",),
+                            lambda: self._query(self.PERSONS_SQL, op="settings")["name"].tolist())
+        return list(names) or list(DEFAULT_PERSONS)
+
+    def set_persons(self, names):
+        names = [n.strip() for n in names if n and n.strip()]
+        names = list(dict.fromkeys(names))  # 重複を除いて順番は保つ
+        if not names:
+            raise ValueError("担当者を1人以上指定してください")
+        def replace(conn):
+            conn.execute("DELETE FROM kaji_person")
+            conn.executemany("INSERT INTO kaji_person (name, sort) VALUES (?, ?)",
+                             [(n, i) for i, n in enumerate(names)])
+
+        with kaji_metrics.timed("settings"):
+            self.pool.write(replace)
+        self._written()
+        return names
+
+    def rollup(self, period="day", by="person", since="", filters=NO_FILTERS):
+        """集計テーブルから period ごと・by（person / task）ごとの合計を返す。
+
+        since は bucket の下限（day/week は 'YYYY-MM-DD'、month は 'YYYY-MM'）。
+        filters の期間は bucket 単位に広げて当てる。
+        """
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"period は {tuple(ROLLUP_PERIODS)} のどれか: {period}")
+        if by not in ("person", "task"):
+            raise ValueError(f"by は person か task: {by}")
+        return self._cached_query(*self.rollup_query(period, by, since, filters), "aggregate")
+
+    @classmethod
+    def rollup_query(cls, period="day", by="person", since="", filters=NO_FILTERS):
+        """rollup が流す (SQL, パラメータ)。check_query_plans からも使う"""
+        bucket_from, bucket_to = filters.bucket_range(period)
+        # since は必ず条件に入れる（主キーの範囲検索にするため）
+        conditions, params = filters.where("bucket", date_from="", date_to=bucket_to or "")
+        since = max(since, bucket_from or "")
+        where = "".join(f" AND {c}" for c in conditions)
+        return cls.ROLLUP_SQL.format(group=by, where=where), (period, since, *params)
+
+    def rebuild_rollups(self):
+        self.pool.write(rebuild_rollups)
+        self._written()
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN の detail 列だけをリストで返す"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
@@ -0,0 +1,190 @@
+"""実績のエクスポート。
+
+ダウンロードボタンが押されたときにだけ作り、カーソルから少しずつ読んで
+書き出すので、履歴が長くてもメモリの使用量はほぼ一定。
+"""
+import csv
+import io
+import tempfile
+import zlib
+
+import kaji_metrics
+from kaji_db import Filters
+
+CSV_COLUMNS = ["id", "date", "task", "person", "time", "note"]
+CHUNK_SIZE = 1000
+SPOOL_MAX_BYTES = 1024 * 1024  # これを超えたら一時ファイルに逃がす
+
+EXPORT_SQL = "SELECT id, date, task, person, minutes || '分' AS time, note FROM kaji"
+LIVE = "deleted_at IS NULL"  # 論理削除した行は書き出さない
+
+
+def build_export_query(date_from=None, date_to=None, persons=None, tasks=None):
+    """条件に合う行を id の降順で返す SQL とパラメータ（条件は一覧の絞り込みと共通）"""
+    where, params = Filters.of(date_from, date_to, persons, tasks).where()
+    sql = EXPORT_SQL + " WHERE " + " AND ".join([LIVE] + where)
+    return sql + " ORDER BY id DESC", params
+
+
+def iter_rows(pool, date_from=None, date_to=None, persons=None, chunk_size=CHUNK_SIZE,
+              tasks=None):
+    sql, params = build_export_query(date_from, date_to, persons, tasks)
+    with pool.reader() as conn:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def iter_csv(pool, date_from=None, date_to=None, persons=None,
+             gzip=False, chunk_size=CHUNK_SIZE, tasks=None):
+    """CSV（UTF-8）をチャンクごとの bytes で返すジェネレータ"""
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # 31 = gzip 形式
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+
+    def flush():
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(CSV_COLUMNS)
+    for rows in iter_rows(pool, date_from, date_to, persons, chunk_size, tasks):
+        writer.writerows(rows)
+        chunk = flush()
+        if chunk:
+            yield chunk
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_csv(pool, date_from=None, date_to=None, persons=None, gzip=False, tasks=None):
+    """iter_csv の出力をファイルオブジェクトにまとめて返す（先頭に戻してある）"""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    with kaji_metrics.timed("export"):
+        for chunk in iter_csv(pool, date_from, date_to, persons, gzip=gzip, tasks=tasks):
+            out.write(chunk)
+    out.seek(0)
+    return out
+
+
+# -------------------------
+# 列指向スナップショット（Arrow IPC / Parquet）
+# ノートブックで型付きのまま読めるように、task と person は辞書エンコード、
+# minutes は整数、date は日付型で書き出す
+# -------------------------
+SNAPSHOT_FORMATS = {
+    # 形式: (拡張子, MIME)
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+SNAPSHOT_SQL = ("SELECT id, date, task, person, minutes FROM kaji "
+                f"WHERE {LIVE} AND id > ? AND id <= ? ORDER BY id")
+MAX_ID_SQL = "SELECT COALESCE(MAX(id), 0) FROM kaji"
+# インデックスだけで取れるので全件は読まない
+DISTINCT_TASK_SQL = f"SELECT DISTINCT task FROM kaji WHERE {LIVE} ORDER BY task"
+DISTINCT_PERSON_SQL = f"SELECT DISTINCT person FROM kaji WHERE {LIVE} ORDER BY person"
+
+
+def snapshot_schema(last_id=0, since_id=0):
+    import pyarrow as pa
+
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("date", pa.date32()),
+            ("task", dictionary),
+            ("person", dictionary),
+            ("minutes", pa.int32()),
+        ],
+        metadata={"since_id": str(since_id), "last_id": str(last_id)},
+    )
+
+
+def iter_record_batches(pool, since_id=0, last_id=None, chunk_size=CHUNK_SIZE * 10):
+    """since_id < id <= last_id の行を RecordBatch で返す。
+
+    辞書は最初に DISTINCT で作って全バッチで共有する（IPC ファイル形式は
+    バッチごとに辞書を変えられないため）。
+    """
+    import pyarrow as pa
+
+    with pool.reader() as conn:
+        # 辞書と本体を同じスナップショットから読む（あいだに編集が入ると辞書にない値が出る）
+        conn.execute("BEGIN")
+        try:
+            if last_id is None:
+                last_id = conn.execute(MAX_ID_SQL).fetchone()[0]
+            schema = snapshot_schema(last_id, since_id)
+            tasks = [row[0] for row in conn.execute(DISTINCT_TASK_SQL)]
+            persons = [row[0] for row in conn.execute(DISTINCT_PERSON_SQL)]
+            task_index = {value: i for i, value in enumerate(tasks)}
+            person_index = {value: i for i, value in enumerate(persons)}
+            task_dict = pa.array(tasks, pa.string())
+            person_dict = pa.array(persons, pa.string())
+
+            cur = conn.execute(SNAPSHOT_SQL, (int(since_id), int(last_id)))
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                ids, dates, task_values, person_values, minutes = zip(*rows)
+                yield pa.record_batch(
+                    [
+                        pa.array(ids, pa.int64()),
+                        pa.array(dates, pa.string()).cast(pa.date32()),
+                        pa.DictionaryArray.from_arrays(
+                            pa.array([task_index[v] for v in task_values], pa.int32()), task_dict
+                        ),
+                        pa.DictionaryArray.from_arrays(
+                            pa.array([person_index[v] for v in person_values], pa.int32()), person_dict
+                        ),
+                        pa.array(minutes, pa.int32()),
+                    ],
+                    schema=schema,
+                )
+        finally:
+            conn.commit()
+
+
+def export_snapshot(pool, since_id=0, fmt="arrow"):
+    """id > since_id の行を Arrow IPC ファイルか Parquet にして返す。
+
+    戻り値は (先頭に戻したファイルオブジェクト, 書き出した最後の id)。次回は
+    その id を since_id に渡せば新しく登録された行だけ取れる。id は登録順に
+    振るだけなので、一覧で直した行（日付・家事・担当者・時間の変更）も、削除・
+    復元した行も差分には出ない。編集や削除を反映したいときは since_id=0 で
+    全件を取り直す。
+    """
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"fmt は {tuple(SNAPSHOT_FORMATS)} のどれか: {fmt}")
+    import pyarrow as pa
+
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    with kaji_metrics.timed("export"):
+        # 書き出し中に登録が入ってもずれないよう、先に上端の id を決めておく
+        with pool.reader() as conn:
+            last_id = max(conn.execute(MAX_ID_SQL).fetchone()[0], int(since_id))
+        schema = snapshot_schema(last_id, since_id)
+        batches = iter_record_batches(pool, since_id, last_id)
+
+        if fmt == "arrow":
+            with pa.ipc.new_file(out, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+        else:
+            import pyarrow.parquet as pq
+
+            with pq.ParquetWriter(out, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+    out.seek(0)
+    return out, last_id
@@ -0,0 +1,191 @@
+"""家庭をまたいだ集計（家事ごとの平均時間、担当者ごとの分担割合など）。
+
+    python kaji_fanout.py --dir households --since 2025-01
+
+家庭ごとの DB から月次の集計テーブルを読む処理をプロセスプールで並列に
+走らせ（map）、結果を足し合わせる（reduce）。家庭ごとの途中結果は
+DBファイル（と WAL）の mtime・サイズをキーに持っておき、変わった家庭
+だけを読み直す。
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from kaji_db import DB_PATH
+from kaji_households import DEFAULT_HOUSEHOLD, HOUSEHOLD_DIR
+
+ROLLUP_VERSION = 3  # kaji_rollup ができた版
+
+PARTIAL_SQL = """
+SELECT person, task, SUM(minutes), SUM(count)
+FROM kaji_rollup
+WHERE period = 'month' AND bucket >= ?
+GROUP BY person, task
+"""
+# 集計テーブルがまだない（古い版の）DB 用
+PARTIAL_FALLBACK_SQL = """
+SELECT person, task, SUM(minutes), COUNT(*)
+FROM kaji
+WHERE substr(date, 1, 7) >= ?
+GROUP BY person, task
+"""
+
+
+def household_files(base_dir=HOUSEHOLD_DIR, default_path=DB_PATH):
+    """{家庭ID: DBファイル} を返す"""
+    files = {}
+    if os.path.exists(default_path):
+        files[DEFAULT_HOUSEHOLD] = default_path
+    for path in sorted(glob.glob(os.path.join(base_dir, "*.db"))):
+        files[os.path.splitext(os.path.basename(path))[0]] = path
+    return files
+
+
+def file_signature(path):
+    """DB が変わったかどうかの目印（本体と WAL の mtime とサイズ）。
+
+    空の WAL はないのと同じに扱う（読むだけでも空の -wal ができるので、
+    区別すると起動直後の2回目も全家庭を読み直すことになる）。
+    """
+    signature = []
+    for p in (path, path + "-wal"):
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((st.st_mtime_ns, st.st_size) if st.st_size or p == path else None)
+    return tuple(signature)
+
+
+def read_partial(path, since=""):
+    """1家庭ぶんの {(person, task): (minutes, count)}（プロセスプールで動く）"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= ROLLUP_VERSION:
+            rows = conn.execute(PARTIAL_SQL, (since,))
+        elif version >= 1:
+            rows = conn.execute(PARTIAL_FALLBACK_SQL, (since,))
+        else:
+            raise ValueError(f"{path}: 古すぎるDBです（一度アプリで開いて移行してください）")
+        return {(person, task): (minutes, count) for person, task, minutes, count in rows}
+    finally:
+        conn.close()
+
+
+class FanoutAggregator:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._partials = {}  # (path, since) -> (signature, partial)
+        self._lock = threading.Lock()
+        self.last_scanned = 0
+        self.errors = {}
+
+    def partials(self, files, since=""):
+        """{家庭ID: partial}。変わった家庭だけプロセスプールで読み直す"""
+        signatures = {h: file_signature(p) for h, p in files.items()}
+        with self._lock:
+            stale = [h for h, p in files.items()
+                     if self._partials.get((p, since), (None,))[0] != signatures[h]]
+
+        results = {}
+        self.errors = {}
+        if stale:
+            if len(stale) == 1 or self.max_workers == 1:
+                outcomes = [_read_safely(files[h], since) for h in stale]
+            else:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(self.max_workers)
+                chunksize = max(1, len(stale) // (4 * self.max_workers))
+                outcomes = list(self._executor.map(
+                    _read_safely, [files[h] for h in stale], [since] * len(stale),
+                    chunksize=chunksize,
+                ))
+            for household, (partial, error) in zip(stale, outcomes):
+                if error is not None:
+                    self.errors[household] = error
+                    continue
+                results[household] = partial
+                with self._lock:
+                    self._partials[(files[household], since)] = (signatures[household], partial)
+        self.last_scanned = len(stale)
+
+        with self._lock:
+            for household, path in files.items():
+                if household not in results and household not in self.errors:
+                    cached = self._partials.get((path, since))
+                    if cached is not None:
+                        results[household] = cached[1]
+        return results
+
+    def report(self, files, since=""):
+        """家庭をまたいだ集計を (by_task, by_person) の DataFrame で返す"""
+        partials = self.partials(files, since)
+        return merge(partials)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def _read_safely(path, since):
+    try:
+        return read_partial(path, since), None
+    except Exception as e:  # 1家庭の失敗で全体を止めない
+        return None, f"{type(e).__name__}: {e}"
+
+
+def merge(partials):
+    """家庭ごとの partial を足し合わせる（reduce）"""
+    rows = [
+        (household, person, task, minutes or 0, count or 0)
+        for household, partial in partials.items()
+        for (person, task), (minutes, count) in partial.items()
+    ]
+    df = pd.DataFrame(rows, columns=["household", "person", "task", "minutes", "count"])
+
+    by_task = df.groupby("task").agg(
+        minutes=("minutes", "sum"), count=("count", "sum"), households=("household", "nunique")
+    )
+    by_task["avg_minutes"] = (by_task["minutes"] / by_task["count"]).round(1)
+    by_task = by_task.sort_values("minutes", ascending=False)
+
+    # 担当者の名前は家庭ごとに違うので、割合は家庭の中で出してから並べる
+    by_person = df.groupby(["household", "person"])[["minutes", "count"]].sum()
+    household_total = by_person.groupby(level="household")["minutes"].transform("sum")
+    by_person["share"] = (by_person["minutes"] / household_total.where(household_total > 0)).round(3)
+    return by_task, by_person
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="家庭をまたいだ集計")
+    parser.add_argument("--dir", default=HOUSEHOLD_DIR, help="家庭ごとの DB があるディレクトリ")
+    parser.add_argument("--db", default=DB_PATH, help="default 家庭の DB")
+    parser.add_argument("--since", default="", help="この月（YYYY-MM）以降だけ")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    files = household_files(args.dir, args.db)
+    aggregator = FanoutAggregator(args.workers)
+    try:
+        by_task, by_person = aggregator.report(files, args.since)
+    finally:
+        aggregator.close()
+    print(f"{len(files)} 家庭（読み直し {aggregator.last_scanned}）")
+    print(by_task.to_string())
+    print()
+    print(by_person.to_string())
+    for household, error in aggregator.errors.items():
+        print(f"NG {household}: {error}")
+
+
+if __name__ == "__main__":
+    main()
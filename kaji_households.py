@@ -0,0 +1,274 @@
+"""家庭（household）ごとに DB ファイルを分ける。
+
+家庭 "default" は今まで通り kaji.db、それ以外は households/<家庭ID>.db を使う。
+開いている DB（接続プール・クエリキャッシュ）は HouseholdRegistry が
+max_open 件まで LRU で持ち、あふれたら一番使われていないものから閉じる。
+何千家庭あってもファイルディスクリプタやメモリが上限で頭打ちになる
+（クエリキャッシュも cache_bytes を max_open 件で分けあう）。
+
+セッションが持ち続けるのは handle() の HouseholdHandle にする。使うたびに
+registry から引き直し、呼び出しの間は追い出されないよう押さえるので、
+閉じられた家庭もその場で開き直して続けられる。
+"""
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from kaji_db import CACHE_MAX_BYTES, DB_PATH, ConnectionPool, KajiRepository, QueryCache
+from kaji_export import export_csv, export_snapshot
+from kaji_import import import_csv
+
+logger = logging.getLogger("kaji.households")
+
+DEFAULT_HOUSEHOLD = "default"
+HOUSEHOLD_DIR = "households"
+MAX_OPEN = 64
+POOL_SIZE = 2  # 1家庭あたりの接続数（家庭数 × これだけ開く）
+
+HOUSEHOLD_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_household(household):
+    """家庭IDを検証する（ファイル名になるので英数字・_・- だけ）"""
+    household = (household or DEFAULT_HOUSEHOLD).strip()
+    if not HOUSEHOLD_ID.match(household):
+        raise ValueError("家庭IDは英数字・_・- の64文字まで")
+    return household
+
+
+def household_path(household, base_dir=HOUSEHOLD_DIR, default_path=DB_PATH):
+    household = validate_household(household)
+    if household == DEFAULT_HOUSEHOLD:
+        return default_path
+    return os.path.join(base_dir, f"{household}.db")
+
+
+class Household:
+    def __init__(self, household, path, pool_size, write_behind=None, cache_bytes=CACHE_MAX_BYTES):
+        self.id = household
+        self.path = path
+        self.pool = ConnectionPool(path, size=pool_size, bootstrap=False)
+        self.cache = QueryCache(path, max_bytes=cache_bytes)
+        self.repo = KajiRepository(self.pool, self.cache)
+        self.write_behind = None
+        if write_behind is not None:
+            from kaji_writeback import WriteBehindQueue
+
+            self.write_behind = WriteBehindQueue(self.repo, **write_behind)
+
+    def import_csv(self, source, compression="infer"):
+        return import_csv(self.pool, source, compression)
+
+    def export_csv(self, filters, gzip=False):
+        return export_csv(self.pool, filters.date_from, filters.date_to, filters.persons,
+                          gzip=gzip, tasks=filters.tasks)
+
+    def export_snapshot(self, since_id=0, fmt="arrow"):
+        return export_snapshot(self.pool, since_id, fmt)
+
+    def write_stats(self):
+        return self.pool.stats.as_dict()
+
+    def close(self):
+        if self.write_behind is not None:
+            self.write_behind.close()  # 保存待ちを書き切ってから閉じる
+        self.pool.close()
+        self.cache.close()
+
+
+class _Pinned:
+    """属性を読むたびに registry から家庭を引き直して、その attr（repo など）に渡す。
+    メソッドの呼び出し中は家庭を押さえておく"""
+
+    def __init__(self, registry, household, attr):
+        self._registry = registry
+        self._household = household
+        self._attr = attr
+
+    def __getattr__(self, name):
+        value = getattr(getattr(self._registry.get(self._household), self._attr), name)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            with self._registry.using(self._household) as entry:
+                return getattr(getattr(entry, self._attr), name)(*args, **kwargs)
+        return call
+
+
+class HouseholdHandle:
+    """セッションが持ち続ける家庭の参照（Household と同じように使える）"""
+
+    def __init__(self, registry, household):
+        entry = registry.get(household)
+        self.registry = registry
+        self.id = entry.id
+        self.path = entry.path
+        self.repo = _Pinned(registry, self.id, "repo")
+        self.write_behind = None
+        if entry.write_behind is not None:
+            self.write_behind = _Pinned(registry, self.id, "write_behind")
+
+    def import_csv(self, source, compression="infer"):
+        with self.registry.using(self.id) as entry:
+            return entry.import_csv(source, compression)
+
+    # 書き出しはプールを直接使うので、書き出している間は追い出されないよう押さえる
+    def export_csv(self, filters, gzip=False):
+        with self.registry.using(self.id) as entry:
+            return entry.export_csv(filters, gzip)
+
+    def export_snapshot(self, since_id=0, fmt="arrow"):
+        with self.registry.using(self.id) as entry:
+            return entry.export_snapshot(since_id, fmt)
+
+    def write_stats(self):
+        with self.registry.using(self.id) as entry:
+            return entry.write_stats()
+
+
+class HouseholdRegistry:
+    """家庭ID → Household を LRU で max_open 件まで持つ。
+
+    write_behind に WriteBehindQueue の引数の dict を渡すと、家庭ごとに
+    書き込みを後回しにするキューを持つ（None なら使わない）。
+    using() の中の家庭は追い出さない（そのあいだは max_open を超えてもよい）。
+    """
+
+    def __init__(self, base_dir=HOUSEHOLD_DIR, default_path=DB_PATH,
+                 max_open=MAX_OPEN, pool_size=POOL_SIZE, write_behind=None,
+                 cache_bytes=CACHE_MAX_BYTES):
+        if max_open < 1:
+            raise ValueError("max_open は 1 以上")
+        self.base_dir = base_dir
+        self.default_path = default_path
+        self.max_open = max_open
+        self.pool_size = pool_size
+        self.write_behind = write_behind
+        self.cache_bytes = cache_bytes  # 全家庭のクエリキャッシュの合計の上限
+        self._open = OrderedDict()
+        self._pins = {}  # 家庭ID -> using() の中にいる数
+        self._failed_writes = {}  # 家庭ID -> 閉じたときに残っていた保存できなかった登録
+        self._opening = {}  # 家庭ID -> 開いている途中の Future（同じ家庭を2回開かない）
+        self._migrated = set()  # スキーマが最新だと分かっている DB のパス
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.evictions = 0
+
+    def _open_entry(self, household):
+        """家庭を開く（ロックの外で呼ぶ。古い DB だとマイグレーションに時間がかかる）"""
+        path = household_path(household, self.base_dir, self.default_path)
+        if path not in self._migrated:
+            # マイグレーションはプロセス内で DB ごとに1回だけ
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            ConnectionPool(path, size=1).close()
+            self._migrated.add(path)
+        entry = Household(household, path, self.pool_size, self.write_behind,
+                          self.cache_bytes // self.max_open)
+        with self._lock:
+            carried = self._failed_writes.pop(household, None)
+        if carried and entry.write_behind is not None:
+            entry.write_behind.adopt_failed(carried)
+        return entry
+
+    def _close(self, entries):
+        """追い出した家庭を閉じる（ロックの外で）。保存できなかった登録は捨てずに、
+        次にその家庭を開いたときのキューへ引き継ぐ"""
+        for old in entries:
+            old.close()
+            failed = old.write_behind.take_failed() if old.write_behind is not None else []
+            if not failed:
+                continue
+            logger.warning("%s の保存できなかった登録 %d件を引き継ぎます", old.id, len(failed))
+            with self._lock:
+                current = self._open.get(old.id)
+                if current is None:
+                    self._failed_writes.setdefault(old.id, []).extend(failed)
+            if current is not None:  # 閉じている間にもう開き直されていた
+                current.write_behind.adopt_failed(failed)
+
+    def _evict(self):
+        """max_open を超えた分を古い順に外す（押さえられている家庭は飛ばす）。ロックの中で呼ぶ"""
+        evicted = []
+        for household in list(self._open):
+            if len(self._open) <= self.max_open:
+                break
+            if self._pins.get(household):
+                continue
+            evicted.append(self._open.pop(household))
+            self.evictions += 1
+        return evicted
+
+    def get(self, household, pin=False):
+        """家庭の Household を返す（開いていなければ開く）。
+
+        開く（マイグレーションする）のは全体のロックの外で、同じ家庭を同時に
+        開こうとした人はその家庭が開き終わるのを待つ。他の家庭は待たせない。
+        """
+        household = validate_household(household)
+        while True:
+            with self._lock:
+                entry = self._open.get(household)
+                if entry is not None:
+                    self._open.move_to_end(household)
+                    if pin:
+                        self._pins[household] = self._pins.get(household, 0) + 1
+                    evicted = self._evict()
+                    break
+                opening = self._opening.get(household)
+                owner = opening is None
+                if owner:
+                    opening = self._opening[household] = Future()
+            if not owner:
+                opening.result()  # 開き終わったらもう一度（失敗していればその例外）
+                continue
+            try:
+                entry = self._open_entry(household)
+            except BaseException as e:
+                with self._lock:
+                    del self._opening[household]
+                opening.set_exception(e)
+                raise
+            with self._lock:
+                del self._opening[household]
+                self._open[household] = entry
+                self.opens += 1
+            opening.set_result(entry)
+        # 閉じるのはロックの外で（保存待ちの書き出しに時間がかかることがある）
+        self._close(evicted)
+        return entry
+
+    @contextmanager
+    def using(self, household):
+        """使っている間は追い出されない Household"""
+        household = validate_household(household)
+        entry = self.get(household, pin=True)
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                self._pins[household] -= 1
+                if not self._pins[household]:
+                    del self._pins[household]
+                evicted = self._evict()
+            self._close(evicted)
+
+    def handle(self, household):
+        return HouseholdHandle(self, household)
+
+    def repository(self, household):
+        return self.handle(household).repo
+
+    def open_households(self):
+        with self._lock:
+            return list(self._open)
+
+    def close(self):
+        with self._lock:
+            entries = list(self._open.values())
+            self._open.clear()
+        self._close(entries)
@@ -0,0 +1,132 @@
+"""CSV からの一括取り込み。
+
+ダウンロードボタンで出した CSV（id, date, task, person, time, note）と、time 列や
+note 列のない古い書き出しの両方を受け付ける。検証は pandas でまとめて行い、登録は
+一時テーブル経由で大きめのトランザクションごとに executemany する。
+(date, task, person, minutes) が同じ行は重複とみなして飛ばす。
+"""
+from dataclasses import dataclass
+
+import pandas as pd
+
+import kaji_metrics
+
+BATCH_SIZE = 10000
+KEY_COLUMNS = ["date", "task", "person", "minutes"]
+COLUMNS = KEY_COLUMNS + ["note"]  # メモは重複の判定には使わない
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+
+
+def read_csv(source, compression="infer"):
+    """CSV を読んで COLUMNS の DataFrame と不正行数を返す
+
+    ファイルオブジェクトでは拡張子から判定できないので、gzip なら
+    compression="gzip" を渡す。
+    """
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False, compression=compression)
+    return normalize(raw)
+
+
+def normalize(raw):
+    missing = {"date", "task", "person"} - set(raw.columns)
+    if missing:
+        raise ValueError(f"CSV に必要な列がありません: {', '.join(sorted(missing))}")
+
+    # 書き出しは id の降順なので、元の id があれば古い順に並べ直して登録する
+    if "id" in raw.columns:
+        raw = raw.assign(_order=pd.to_numeric(raw["id"], errors="coerce"))
+        raw = raw.sort_values("_order", kind="stable", na_position="last")
+
+    df = pd.DataFrame({
+        "date": pd.to_datetime(raw["date"].str.strip(), errors="coerce", format="%Y-%m-%d"),
+        "task": raw["task"].str.strip(),
+        "person": raw["person"].str.strip(),
+    })
+    if "minutes" in raw.columns:
+        minutes = raw["minutes"]
+    elif "time" in raw.columns:
+        minutes = raw["time"].str.replace("分", "", regex=False)
+    else:
+        # kaji_ver1 の頃の書き出しには時間がない
+        minutes = pd.Series("0", index=raw.index)
+    df["minutes"] = pd.to_numeric(minutes.str.strip(), errors="coerce")
+    df["note"] = raw["note"].str.strip() if "note" in raw.columns else ""
+
+    valid = (
+        df["date"].notna()
+        & (df["task"] != "")
+        & (df["person"] != "")
+        & df["minutes"].notna()
+        & (df["minutes"] >= 0)
+        & (df["minutes"] == df["minutes"].round())
+    )
+    df = df[valid].copy()
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    df["minutes"] = df["minutes"].astype("int64")
+    return df[COLUMNS].reset_index(drop=True), int((~valid).sum())
+
+
+def drop_duplicate_rows(df):
+    """ファイル内の重複を (date, task, person, minutes) のハッシュで落とす"""
+    hashes = pd.util.hash_pandas_object(df[KEY_COLUMNS], index=False)
+    keep = ~hashes.duplicated()
+    return df[keep.to_numpy()], int((~keep).sum())
+
+
+# 既存の行との重複は idx_kaji_date (date, person, task, minutes) だけで判定できる
+# （削除済みの行は重複とみなさないので、消した行を取り込み直すと戻る）
+STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS kaji_import (
+    date TEXT, task TEXT, person TEXT, minutes INTEGER, note TEXT
+)
+"""
+STAGE_INSERT_SQL = ("INSERT INTO temp.kaji_import (date, task, person, minutes, note) "
+                    "VALUES (?, ?, ?, ?, ?)")
+MERGE_SQL = """
+INSERT INTO kaji (date, task, person, minutes, note)
+SELECT s.date, s.task, s.person, s.minutes, s.note
+FROM temp.kaji_import AS s
+WHERE NOT EXISTS (
+    SELECT 1 FROM kaji AS k
+    WHERE k.deleted_at IS NULL
+      AND k.date = s.date AND k.person = s.person
+      AND k.task = s.task AND k.minutes = s.minutes
+)
+ORDER BY s.rowid
+"""
+
+
+def import_rows(pool, df, batch_size=BATCH_SIZE):
+    """正規化済みの DataFrame を登録して ImportResult を返す"""
+    df, duplicates = drop_duplicate_rows(df)
+    result = ImportResult(duplicates=duplicates)
+
+    def merge(conn, rows):
+        # 一時テーブルは書き込み接続の上に作る（失敗すればロールバックで空に戻る）
+        conn.execute(STAGE_SQL)
+        conn.executemany(STAGE_INSERT_SQL, rows)
+        inserted = conn.execute(MERGE_SQL).rowcount
+        conn.execute("DELETE FROM temp.kaji_import")
+        return inserted
+
+    with kaji_metrics.timed("import"):
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            rows = list(batch.itertuples(index=False, name=None))
+            inserted = pool.write(lambda conn: merge(conn, rows))
+            result.inserted += inserted
+            result.duplicates += len(batch) - inserted
+    return result
+
+
+def import_csv(pool, source, compression="infer", batch_size=BATCH_SIZE):
+    df, invalid = read_csv(source, compression)
+    result = import_rows(pool, df, batch_size)
+    result.invalid = invalid
+    return result
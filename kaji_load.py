@@ -0,0 +1,605 @@
+"""同時に使う人（セッション）を N 人ぶん模して負荷をかける。1台で何家庭・何人まで
+さばけるかを見るためのもの。
+
+    python kaji_load.py --sessions 20 --duration 30                  # データ層を直接
+    python kaji_load.py --sessions 40 --processes 4 --households 20  # 複数プロセスから
+    python kaji_load.py --target daemon --socket kaji.sock           # kaji_daemon 経由
+    python kaji_load.py --target websocket --url ws://127.0.0.1:8501 \\
+        --metrics-url http://127.0.0.1:9100/metrics                  # 動いている Streamlit に
+
+各セッションは「一覧を開く・スクロール・登録・削除」を MIX の割合で、考える時間
+（平均 --think 秒の指数分布）をはさみながら --duration 秒くり返す。使う家庭は
+load0〜load<households-1>（default 家庭のデータには触らない）で、空なら
+--seed-rows 行の合成データを先に入れておく。
+
+direct / daemon はリポジトリ（KajiRepository / RemoteRepository）を呼ぶ。
+websocket はブラウザの代わりに /_stcore/stream で rerun を送り、ボタンを押して
+script_finished までを測る（登録フォームの入力は既定値のまま）。
+
+結果は操作ごとの件数・スループット・p50/p95/p99 と、書き込みロックの待ち・
+SQLITE_BUSY の回数（direct / daemon は pool.stats、websocket は --metrics-url の
+/metrics の差分）。--out で JSON にも書き出す。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from kaji_bench import generate_chores, random_chore
+from kaji_metrics import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TARGETS = ("direct", "daemon", "websocket")
+# 操作の割合（一覧を見る・スクロールが多く、削除はまれ）
+MIX = {"list": 0.45, "scroll": 0.25, "insert": 0.25, "delete": 0.05}
+SESSIONS = 10
+DURATION = 30.0  # 秒
+THINK = 0.5  # 秒（0 なら休まずに続ける）
+HOUSEHOLDS = 4
+SEED_ROWS = 10_000
+PAGE_SIZE = 20
+WS_TIMEOUT = 60.0  # websocket の1操作の上限[秒]
+SEED = 20250208
+
+# websocket で押すボタン・ウィジェット（Kaji.py のラベル）
+REGISTER_BUTTON = "登録"
+MORE_BUTTON = "もっと見る ▶"
+SAVE_EDIT_BUTTON = "変更を保存"
+EDIT_TOGGLE = "✏️ 編集・削除"
+
+
+def household_of(session):
+    return f"load{session}"
+
+
+# -------------------------
+# 計測結果
+# -------------------------
+class Recorder:
+    """操作ごとの所要時間[秒]とエラー数（スレッドから同時に記録してよい）"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.error_examples = {}
+        self._lock = threading.Lock()
+
+    def record(self, op, seconds, error=None):
+        with self._lock:
+            if error is None:
+                self.samples.setdefault(op, []).append(seconds)
+            else:
+                self.errors[op] = self.errors.get(op, 0) + 1
+                self.error_examples.setdefault(op, f"{type(error).__name__}: {error}")
+
+    def measure(self, op, fn):
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:  # 1回の失敗で負荷を止めない
+            self.record(op, time.perf_counter() - started, e)
+            return None
+        self.record(op, time.perf_counter() - started)
+        return result
+
+    def as_dict(self):
+        with self._lock:
+            return {"samples": {op: list(v) for op, v in self.samples.items()},
+                    "errors": dict(self.errors),
+                    "error_examples": dict(self.error_examples)}
+
+    def merge(self, other):
+        """as_dict() の結果（別プロセスの分）を足す"""
+        with self._lock:
+            for op, values in other["samples"].items():
+                self.samples.setdefault(op, []).extend(values)
+            for op, count in other["errors"].items():
+                self.errors[op] = self.errors.get(op, 0) + count
+            for op, example in other["error_examples"].items():
+                self.error_examples.setdefault(op, example)
+
+
+LOCK_KEYS = ("writes", "lock_waits", "lock_wait_seconds", "sqlite_wait_seconds",
+             "busy_retries", "busy_errors")
+
+
+def add_lock_stats(total, stats, sign=1):
+    for key in LOCK_KEYS:
+        total[key] = total.get(key, 0) + sign * stats.get(key, 0)
+    if sign > 0:
+        total["max_lock_wait"] = max(total.get("max_lock_wait", 0), stats.get("max_lock_wait", 0))
+    return total
+
+
+# -------------------------
+# データ層（direct / daemon）
+# -------------------------
+def open_households(target, options):
+    if target == "daemon":
+        from kaji_daemon import RemoteHouseholds
+
+        return RemoteHouseholds(options["socket"], options["dir"], options["db"])
+    from kaji_households import HouseholdRegistry
+
+    return HouseholdRegistry(options["dir"], options["db"])
+
+
+def seed_households(households, count, rows, seed=SEED):
+    """空の家庭に rows 行の合成データを入れる（2回目以降の実行では入れない）"""
+    for i in range(count):
+        repo = households.repository(household_of(i))
+        if rows and repo.list_page(None, 1)[0].empty:
+            chores = generate_chores(rows, seed + i)
+            for start in range(0, len(chores), 5000):
+                repo.insert_many(chores[start:start + 5000])
+
+
+class DataSession:
+    """1人ぶん。repo（KajiRepository か RemoteRepository）を直接呼ぶ"""
+
+    def __init__(self, repo, rng, recorder, think=THINK, page_size=PAGE_SIZE):
+        self.repo = repo
+        self.rng = rng
+        self.recorder = recorder
+        self.think = think
+        self.page_size = page_size
+        self.last_id = None  # 次のページの境界（スクロールできなければ None）
+        self.mine = []  # このセッションで登録した id（削除するのはこの中から）
+
+    def run(self, deadline):
+        ops, weights = list(MIX), list(MIX.values())
+        while time.monotonic() < deadline:
+            self.step(self.rng.choices(ops, weights)[0])
+            if self.think:
+                time.sleep(self.rng.expovariate(1 / self.think))
+
+    def step(self, op):
+        if op == "scroll" and self.last_id is None:
+            op = "list"
+        if op == "delete" and not self.mine:
+            op = "insert"
+        if op in ("list", "scroll"):
+            before_id = self.last_id if op == "scroll" else None
+            page = self.recorder.measure(op, lambda: self.repo.list_page(before_id, self.page_size))
+            if page is not None:
+                df, has_more = page
+                self.last_id = int(df["id"].iloc[-1]) if has_more else None
+        elif op == "insert":
+            row = random_chore(self.rng, date.today())
+            new_id = self.recorder.measure(op, lambda: self.repo.insert(*row))
+            if new_id is not None:
+                self.mine.append(new_id)
+        else:
+            task_id = self.mine.pop(self.rng.randrange(len(self.mine)))
+            self.recorder.measure(op, lambda: self.repo.delete(task_id))
+
+
+def daemon_lock_stats(households, count):
+    total = {}
+    for i in range(count):
+        add_lock_stats(total, households.get(household_of(i)).write_stats())
+    return total
+
+
+def run_data_sessions(target, options, sessions, duration, think, seed):
+    """sessions（セッション番号のリスト）をスレッドで動かす（プロセスプールでも呼ぶ）"""
+    households = open_households(target, options)
+    recorder = Recorder()
+    try:
+        deadline = time.monotonic() + duration
+        threads = [
+            threading.Thread(
+                target=DataSession(
+                    households.repository(household_of(s % options["households"])),
+                    random.Random(seed + s), recorder, think,
+                ).run,
+                args=(deadline,), name=f"kaji-load-{s}",
+            )
+            for s in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        locks = {}
+        if target == "direct":
+            # このプロセスで開いたプールの分（daemon の分は呼び出し側でまとめて取る）
+            for s in sorted({s % options["households"] for s in sessions}):
+                add_lock_stats(locks, households.get(household_of(s)).write_stats())
+    finally:
+        households.close()
+    return recorder.as_dict(), locks
+
+
+# -------------------------
+# Streamlit（websocket）
+# -------------------------
+def _row_count(dataframe):
+    """st.dataframe / data_editor の要素（proto）に載っている行数"""
+    if dataframe.HasField("lazy_data"):
+        return dataframe.lazy_data.row_count
+    if not dataframe.arrow_data.data:
+        return 0
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(dataframe.arrow_data.data).read_all().num_rows
+
+
+class StreamlitSession:
+    """ブラウザの代わりに /_stcore/stream で Kaji.py を操作する1人ぶん。
+
+    ブラウザと同じく、rerun のたびに画面のウィジェット（種類・ラベル → id と
+    fragment id）を読み直す。fragment id は画面上の位置で変わるので使い回さない。
+    """
+
+    def __init__(self, url, household, rng, recorder, think=THINK, timeout=WS_TIMEOUT):
+        self.url = url.rstrip("/") + "/_stcore/stream"
+        self.household = household
+        self.rng = rng
+        self.recorder = recorder
+        self.think = think
+        self.timeout = timeout
+        self.ws = None
+        self.page_script_hash = ""
+        self.widgets = {}  # (種類, ラベル) -> (widget id, fragment id)
+        self.editor_rows = 0  # 編集モードの表に出ている行数
+        self.values = {}  # widget id -> WidgetState（ブラウザが覚えている値）
+
+    async def connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, fragment_id="", extra=()):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = f"household={self.household}"
+        state.page_script_hash = self.page_script_hash
+        if fragment_id:
+            state.fragment_id = fragment_id
+        state.widget_states.widgets.extend(list(self.values.values()) + list(extra))
+        await self.ws.send(msg.SerializeToString())
+
+        error = None
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await self.ws.recv())
+            kind = reply.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = reply.new_session.main_script_hash
+            elif kind == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                element = reply.delta.new_element
+                name = element.WhichOneof("type")
+                if name == "exception":
+                    error = RuntimeError(element.exception.message)
+                widget = getattr(element, name)
+                fields = widget.DESCRIPTOR.fields_by_name
+                if "id" in fields and widget.id:
+                    label = widget.label if "label" in fields else ""
+                    self.widgets[(name, label)] = (widget.id, reply.delta.fragment_id)
+                    if name == "dataframe":
+                        self.editor_rows = _row_count(widget)
+            elif kind == "script_finished":
+                # フラグメントの中の st.rerun() だと、続けて全体の実行が来る
+                if reply.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        if error is not None:
+            raise error
+
+    def _trigger(self, kind, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        if (kind, label) not in self.widgets:
+            raise LookupError(f"{label!r} が画面にありません")
+        widget_id, fragment_id = self.widgets[(kind, label)]
+        return fragment_id, [WidgetState(id=widget_id, trigger_value=True)]
+
+    async def step(self, op):
+        if op == "scroll" and ("button", MORE_BUTTON) not in self.widgets:
+            op = "list"
+        started = time.perf_counter()
+        try:
+            if op == "list":
+                self.widgets = {}
+                await self._timed(self.rerun())
+            elif op == "scroll":
+                await self._timed(self.rerun(*self._trigger("button", MORE_BUTTON)))
+            elif op == "insert":
+                await self._timed(self.rerun(*self._trigger("button", REGISTER_BUTTON)))
+            else:
+                await self._delete()
+        except Exception as e:
+            self.recorder.record(op, time.perf_counter() - started, e)
+            return
+        self.recorder.record(op, time.perf_counter() - started)
+
+    async def _delete(self):
+        """編集モードにして、表に出ている行の1つに削除の印を付けて保存する"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        toggle_id, toggle_fragment = self.widgets.get(("checkbox", EDIT_TOGGLE), (None, ""))
+        if toggle_id is None:
+            raise LookupError(f"{EDIT_TOGGLE!r} が画面にありません")
+        editor_id = None
+        saved = False
+        try:
+            self.values[toggle_id] = WidgetState(id=toggle_id, bool_value=True)
+            self.editor_rows = 0
+            await self._timed(self.rerun(toggle_fragment))
+            editor_id, _ = self.widgets[("dataframe", "")]
+            if not self.editor_rows:
+                raise LookupError("消せる行が表にありません")
+            # 同じ家庭のセッションどうしで同じ行を消し合わないよう、行はばらす
+            row = str(self.rng.randrange(self.editor_rows))
+            edits = {"edited_rows": {row: {"delete": True}}, "added_rows": [], "deleted_rows": []}
+            fragment_id, trigger = self._trigger("button", SAVE_EDIT_BUTTON)
+            # ブラウザの data_editor は編集内容を JSON 文字列で送る
+            editor = WidgetState(id=editor_id, string_value=json.dumps(edits))
+            await self._timed(self.rerun(fragment_id, trigger + [editor]))
+            saved = True
+        finally:
+            # 失敗しても編集モードと表の編集内容を残さない（次の操作まで巻き込まないように）
+            self.values[toggle_id] = WidgetState(id=toggle_id, bool_value=False)
+            if not saved and editor_id is not None:
+                empty = {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+                reset = WidgetState(id=editor_id, string_value=json.dumps(empty))
+                try:
+                    await self._timed(self.rerun(toggle_fragment, [reset]))
+                except Exception:
+                    pass
+
+    async def _timed(self, coro):
+        await asyncio.wait_for(coro, self.timeout)
+
+    async def run(self, deadline):
+        ops, weights = list(MIX), list(MIX.values())
+        await self.connect()
+        try:
+            await self.step("list")
+            while time.monotonic() < deadline:
+                await self.step(self.rng.choices(ops, weights)[0])
+                if self.think:
+                    await asyncio.sleep(self.rng.expovariate(1 / self.think))
+        finally:
+            await self.close()
+
+
+async def _run_websocket(url, sessions, households, duration, think, seed, recorder):
+    deadline = time.monotonic() + duration
+    runners = [
+        StreamlitSession(url, household_of(s % households), random.Random(seed + s),
+                         recorder, think).run(deadline)
+        for s in range(sessions)
+    ]
+    for result in await asyncio.gather(*runners, return_exceptions=True):
+        if isinstance(result, Exception):  # 接続できなかったなど
+            recorder.record("connect", 0, result)
+
+
+def scrape_metrics(url, missing_ok=False):
+    """/metrics から SQLite のロック関係の値だけを {名前{ラベル}: 値} で返す
+
+    Kaji.py の /metrics は最初の画面の実行で立ち上がるので、負荷をかける前は
+    missing_ok=True で「まだ無ければ全部 0」とみなす。
+    """
+    if not url:
+        return {}
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            text = response.read().decode("utf-8")
+    except urllib.error.URLError:
+        if missing_ok:
+            return {}
+        raise
+    values = {}
+    for line in text.splitlines():
+        if line.startswith(("kaji_sqlite_busy_total", "kaji_lock_wait_seconds_sum",
+                            "kaji_lock_wait_seconds_count")):
+            name, _, value = line.rpartition(" ")
+            values[name] = float(value)
+    return values
+
+
+def metrics_lock_stats(before, after):
+    """/metrics の差分を pool.stats と同じ形（分かる分だけ）にする"""
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    return {
+        "writes": delta('kaji_lock_wait_seconds_count{kind="sqlite"}'),
+        "lock_wait_seconds": delta('kaji_lock_wait_seconds_sum{kind="thread"}'),
+        "sqlite_wait_seconds": delta('kaji_lock_wait_seconds_sum{kind="sqlite"}'),
+        "busy_retries": delta('kaji_sqlite_busy_total{kind="retry"}'),
+        "busy_errors": delta('kaji_sqlite_busy_total{kind="error"}'),
+    }
+
+
+# -------------------------
+# 実行とまとめ
+# -------------------------
+def run(target, sessions=SESSIONS, duration=DURATION, think=THINK, households=HOUSEHOLDS,
+        processes=1, seed_rows=SEED_ROWS, seed=SEED, **options):
+    """負荷をかけて (Recorder, ロックの統計, 経過秒) を返す"""
+    if target not in TARGETS:
+        raise ValueError(f"target は {TARGETS} のどれか: {target}")
+    households = max(1, min(households, sessions))
+    options["households"] = households
+    recorder = Recorder()
+
+    if target == "websocket":
+        # 家庭のデータはサーバーと同じ DB ファイルに先に入れておく
+        registry = open_households("direct", options)
+        try:
+            seed_households(registry, households, seed_rows, seed)
+        finally:
+            registry.close()
+        before = scrape_metrics(options.get("metrics_url"), missing_ok=True)
+        started = time.perf_counter()
+        asyncio.run(_run_websocket(options["url"], sessions, households, duration, think, seed,
+                                   recorder))
+        elapsed = time.perf_counter() - started
+        return recorder, metrics_lock_stats(before, scrape_metrics(options.get("metrics_url"))), elapsed
+
+    registry = open_households(target, options)
+    try:
+        seed_households(registry, households, seed_rows, seed)
+        # daemon の統計は立ち上げてからの累計なので、前後の差を取る
+        before = daemon_lock_stats(registry, households) if target == "daemon" else {}
+    finally:
+        registry.close()
+    groups = [list(range(sessions))[i::processes] for i in range(processes)]
+    groups = [g for g in groups if g]
+    locks = {}
+    started = time.perf_counter()
+    if len(groups) == 1:
+        results = [run_data_sessions(target, options, groups[0], duration, think, seed)]
+    else:
+        with ProcessPoolExecutor(len(groups)) as executor:
+            results = list(executor.map(
+                run_data_sessions, [target] * len(groups), [options] * len(groups), groups,
+                [duration] * len(groups), [think] * len(groups), [seed] * len(groups),
+            ))
+    elapsed = time.perf_counter() - started
+    for samples, lock_stats in results:
+        recorder.merge(samples)
+        add_lock_stats(locks, lock_stats)
+    if target == "daemon":
+        registry = open_households(target, options)
+        try:
+            add_lock_stats(locks, daemon_lock_stats(registry, households))
+            add_lock_stats(locks, before, -1)
+        finally:
+            registry.close()
+    return recorder, locks, elapsed
+
+
+def summarize(recorder, elapsed):
+    """操作ごとの {count, errors, per_second, p50, p95, p99}（秒）"""
+    ops = list(MIX) + sorted((set(recorder.samples) | set(recorder.errors)) - set(MIX))
+    rows = {}
+    everything = []
+    for op in ops:
+        values = recorder.samples.get(op, [])
+        errors = recorder.errors.get(op, 0)
+        if not values and not errors:
+            continue
+        everything.extend(values)
+        rows[op] = _row(values, errors, elapsed)
+    rows["(合計)"] = _row(everything, sum(recorder.errors.values()), elapsed)
+    return rows
+
+
+def _row(values, errors, elapsed):
+    return {
+        "count": len(values), "errors": errors,
+        "per_second": round(len(values) / elapsed, 2) if elapsed else None,
+        "p50": percentile(values, 50), "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def print_report(rows, locks, elapsed, recorder):
+    print(f"{elapsed:.1f} 秒")
+    print(f"{'操作':<8}{'件数':>8}{'エラー':>7}{'件/秒':>9}{'p50':>9}{'p95':>9}{'p99':>9}  [ms]")
+    for op, r in rows.items():
+        print(f"{op:<8}{r['count']:>10}{r['errors']:>8}{r['per_second']:>10}"
+              f"{_ms(r['p50']):>9}{_ms(r['p95']):>9}{_ms(r['p99']):>9}")
+    if locks:
+        print(
+            f"書き込みロック: 書き込み {locks.get('writes', 0):.0f} 回・"
+            f"プロセス内で待った {locks.get('lock_waits', 0):.0f} 回"
+            f"（計 {locks.get('lock_wait_seconds', 0):.3f} 秒・"
+            f"最大 {locks.get('max_lock_wait', 0):.3f} 秒）・"
+            f"SQLite の待ち 計 {locks.get('sqlite_wait_seconds', 0):.3f} 秒・"
+            f"busy のやり直し {locks.get('busy_retries', 0):.0f} 回・失敗 {locks.get('busy_errors', 0):.0f} 回"
+        )
+    for op, example in recorder.error_examples.items():
+        print(f"エラーの例（{op}）: {example}")
+
+
+def main(argv=None):
+    from kaji_daemon import SOCKET_PATH
+
+    parser = argparse.ArgumentParser(description="複数セッションの負荷試験")
+    parser.add_argument("--target", choices=TARGETS, default="direct")
+    parser.add_argument("--sessions", type=int, default=SESSIONS, help="同時に使う人の数")
+    parser.add_argument("--duration", type=float, default=DURATION, help="負荷をかける時間[秒]")
+    parser.add_argument("--think", type=float, default=THINK,
+                        help="操作の間に考える時間の平均[秒]（0 なら休まない）")
+    parser.add_argument("--households", type=int, default=HOUSEHOLDS, help="使う家庭の数")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="direct / daemon でセッションを分けるプロセスの数")
+    parser.add_argument("--seed-rows", type=int, default=SEED_ROWS,
+                        help="空の家庭に先に入れておく行数")
+    parser.add_argument("--dir", help="家庭ごとの DB のディレクトリ（direct は既定で一時ディレクトリ。"
+                                      "daemon / websocket はサーバーと同じものを指定）")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="daemon のソケット")
+    parser.add_argument("--url", default="ws://127.0.0.1:8501", help="Streamlit の URL")
+    parser.add_argument("--metrics-url", help="Streamlit の /metrics（KAJI_METRICS_PORT）")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", help="結果を JSON で書き出すファイル")
+    args = parser.parse_args(argv)
+
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    workdir = None
+    if args.dir is None:
+        if args.target == "direct":
+            workdir = args.dir = tempfile.mkdtemp(prefix="kaji_load_")
+        else:
+            from kaji_households import HOUSEHOLD_DIR
+
+            args.dir = HOUSEHOLD_DIR
+    try:
+        recorder, locks, elapsed = run(
+            args.target, args.sessions, args.duration, args.think, args.households,
+            max(1, args.processes), args.seed_rows, args.seed,
+            dir=args.dir, db=os.path.join(args.dir, "kaji.db"), socket=args.socket,
+            url=args.url, metrics_url=args.metrics_url,
+        )
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = summarize(recorder, elapsed)
+    print_report(rows, locks, elapsed, recorder)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "config": {k: v for k, v in vars(args).items() if k != "out"},
+                "seconds": round(elapsed, 3),
+                "operations": rows,
+                "locks": locks,
+                "errors": recorder.error_examples,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"結果を {args.out} に書きました")
+
+
+if __name__ == "__main__":
+    main()
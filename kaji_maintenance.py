@@ -0,0 +1,163 @@
+"""削除済みの行の片付けと DB の手入れ（画面の処理とは別のスレッドで動かす）。
+
+    python kaji_maintenance.py [--db kaji.db] [--dir households]
+
+1. 保存期間（RETENTION_DAYS）を過ぎた論理削除の行を PURGE_BATCH 件ずつ物理削除
+2. auto_vacuum=INCREMENTAL の DB なら空きページを VACUUM_PAGES ずつ OS に返す
+3. PRAGMA optimize で必要なテーブルだけ統計を取り直す
+
+トランザクションは小さく切り、間に PAUSE 秒休むので、使っている人の登録を
+長く待たせない。書き込みは ConnectionPool.write を通すので、アプリの登録と
+同じ書き込み接続で順番に流れ、SQLITE_BUSY のやり直しとロック待ちの記録も
+同じになる（開いている家庭はアプリのプールを、それ以外は一時的なプールを使う）。
+集計テーブルと検索の索引は論理削除の時点で外してあるので、物理削除では
+トリガーは何もしない。
+"""
+import argparse
+import logging
+import threading
+import time
+
+import kaji_metrics
+from kaji_db import DB_PATH, ConnectionPool
+from kaji_households import HOUSEHOLD_DIR
+
+logger = logging.getLogger("kaji.maintenance")
+
+RETENTION_DAYS = 7
+PURGE_BATCH = 500
+VACUUM_PAGES = 1000
+PAUSE = 0.05  # 秒。バッチの間に休んで書き込みを割り込ませる
+INTERVAL = 3600  # 秒
+ANALYSIS_LIMIT = 1000  # optimize の ANALYZE で1インデックスあたりに見る行数の目安
+
+SOFT_DELETE_VERSION = 6  # deleted_at 列ができた版
+
+# idx_kaji_deleted（削除済みの行だけの部分インデックス）で古い順に拾う
+PURGE_SQL = """
+DELETE FROM kaji WHERE id IN (
+    SELECT id FROM kaji WHERE deleted_at < ? ORDER BY deleted_at LIMIT ?
+)
+"""
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def purge(pool, retention_days=RETENTION_DAYS, batch=PURGE_BATCH, pause=PAUSE):
+    """保存期間を過ぎた削除済みの行を消して、消した行数を返す"""
+    cutoff = int(time.time()) - int(retention_days * 24 * 3600)
+    purged = 0
+    while True:
+        with kaji_metrics.timed("purge"):
+            count = pool.write(lambda conn: conn.execute(PURGE_SQL, (cutoff, batch)).rowcount)
+        purged += count
+        if count < batch:
+            return purged
+        time.sleep(pause)
+
+
+def incremental_vacuum(pool, pages=VACUUM_PAGES, pause=PAUSE):
+    """空きページを pages ずつ返して、返したページ数を返す（INCREMENTAL でなければ 0）"""
+    with pool.reader() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return 0
+    freed = 0
+    while True:
+        with pool.reader() as conn:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return freed
+        with kaji_metrics.timed("vacuum"):
+            # 結果を読み切らないと最後まで実行されない
+            pool.write(lambda conn: conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall())
+        freed += min(free, pages)
+        time.sleep(pause)
+
+
+def maintain(pool, retention_days=RETENTION_DAYS, batch=PURGE_BATCH,
+             vacuum_pages=VACUUM_PAGES, pause=PAUSE):
+    """1つの DB（の ConnectionPool）を手入れして {"purged": 行数, "freed_pages": ページ数} を返す"""
+    with pool.reader() as conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SOFT_DELETE_VERSION:
+            return {"purged": 0, "freed_pages": 0}  # まだアプリで開かれていない古い DB
+    purged = purge(pool, retention_days, batch, pause)
+    freed = incremental_vacuum(pool, vacuum_pages, pause)
+    with kaji_metrics.timed("optimize"), pool.writer() as conn:
+        conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        conn.execute("PRAGMA optimize")
+    return {"purged": purged, "freed_pages": freed}
+
+
+def maintain_file(path, **options):
+    """アプリが開いていない DB を一時的なプールで手入れする"""
+    pool = ConnectionPool(path, size=1, bootstrap=False)
+    try:
+        return maintain(pool, **options)
+    finally:
+        pool.close()
+
+
+class MaintenanceJob:
+    """households()（{家庭ID: DBファイル} を返す関数）の DB を interval 秒ごとに手入れする。
+
+    registry（HouseholdRegistry）を渡すと、開いている家庭はそのプールで書く。
+    """
+
+    def __init__(self, households, interval=INTERVAL, registry=None, **options):
+        self.households = households
+        self.interval = interval
+        self.registry = registry
+        self.options = options
+        self.runs = 0
+        self.last_result = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kaji-maintenance", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=30):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def run_once(self):
+        results = {}
+        for household, path in self.households().items():
+            if self._stop.is_set():
+                break
+            try:
+                results[path] = self._maintain(household, path)
+            except Exception:  # 1つの DB の失敗で他の DB の手入れを止めない
+                logger.exception("%s の手入れに失敗", path)
+        self.runs += 1
+        self.last_result = results
+        return results
+
+    def _maintain(self, household, path):
+        if self.registry is not None and household in self.registry.open_households():
+            with self.registry.using(household) as entry:
+                return maintain(entry.pool, **self.options)
+        return maintain_file(path, **self.options)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+def main(argv=None):
+    from kaji_fanout import household_files
+
+    parser = argparse.ArgumentParser(description="削除済みの行の片付けと DB の手入れ")
+    parser.add_argument("--db", default=DB_PATH, help="default 家庭の DB")
+    parser.add_argument("--dir", default=HOUSEHOLD_DIR, help="家庭ごとの DB があるディレクトリ")
+    parser.add_argument("--retention-days", type=float, default=RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    for household, path in household_files(args.dir, args.db).items():
+        result = maintain_file(path, retention_days=args.retention_days)
+        print(f"{household}: 削除 {result['purged']}行・空きページ {result['freed_pages']} を返却")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Kaji.py の1回の実行（rerun）ごとの計測。
+
+環境変数 KAJI_PROFILE=1 のときだけ有効になる。無効のときは phase() なども
+ほぼ何もしない。有効にすると
+
+- フェーズ（DB接続・一覧・集計など）ごとの時間
+- SQL の実行回数・コミット回数（sqlite3 のトレースで数える）
+- 読んだ行数と画面・ダウンロードに渡したバイト数
+
+を記録し、直近 RECENT_RUNS 回分をリングバッファに残して、ロガー
+"kaji.profile" に1行1JSONで書く。
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+RECENT_RUNS = 200
+
+logger = logging.getLogger("kaji.profile")
+
+
+def enabled():
+    return os.environ.get("KAJI_PROFILE", "") not in ("", "0")
+
+
+class RunProfile:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        self.commits = 0
+        self.rows = 0
+        self.bytes_out = 0
+        self.seconds = None
+
+    def as_dict(self):
+        return {
+            "run": self.name,
+            "seconds": self.seconds,
+            "phases": self.phases,
+            "queries": self.queries,
+            "commits": self.commits,
+            "rows": self.rows,
+            "bytes_out": self.bytes_out,
+        }
+
+
+_local = threading.local()
+_recent = deque(maxlen=RECENT_RUNS)
+_recent_lock = threading.Lock()
+
+
+def current():
+    return getattr(_local, "profile", None)
+
+
+def start_run(name="app"):
+    if not enabled():
+        return None
+    if current() is not None:
+        # 前の実行が st.rerun() で途中終了していたら、そこまでを記録しておく
+        current().name += " (rerun)"
+        finish_run()
+    _local.profile = RunProfile(name)
+    return _local.profile
+
+
+def finish_run():
+    profile = current()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.seconds = round(time.perf_counter() - profile.started, 6)
+    with _recent_lock:
+        _recent.append(profile)
+    logger.info(json.dumps(profile.as_dict(), ensure_ascii=False))
+    return profile
+
+
+@contextmanager
+def phase(name):
+    profile = current()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        profile.phases[name] = round(profile.phases.get(name, 0) + elapsed, 6)
+
+
+def profiled(name):
+    """フラグメント用。全体の実行中ならそのフェーズとして、フラグメント
+    だけの再実行なら独立した1回の実行として記録する"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current() is not None:
+                with phase(name):
+                    return fn(*args, **kwargs)
+            start_run(name)
+            try:
+                with phase(name):
+                    return fn(*args, **kwargs)
+            finally:
+                finish_run()
+        return wrapper
+    return decorator
+
+
+def add_rows(rows):
+    profile = current()
+    if profile is not None:
+        profile.rows += rows
+
+
+def add_bytes(nbytes, kind="html"):
+    """画面（html）やダウンロード（download）に実際に渡したバイト数。
+    ダウンロードの中身はボタンが押されたとき実行の外で作られるので、
+    カウンターにも足しておく"""
+    BYTES_OUT.inc(kind, amount=nbytes)
+    profile = current()
+    if profile is not None:
+        profile.bytes_out += nbytes
+
+
+def trace_statement(sql):
+    """sqlite3.Connection.set_trace_callback に渡す"""
+    profile = current()
+    if profile is None or sql.startswith("--"):  # "--" はトリガー内の文
+        return
+    if sql.startswith("COMMIT"):
+        profile.commits += 1
+    else:
+        profile.queries += 1
+
+
+# -------------------------
+# 直近の実行のまとめ
+# -------------------------
+def recent_runs():
+    with _recent_lock:
+        return list(_recent)
+
+
+def percentile(values, q):
+    """q（0〜100）パーセンタイル。最近傍で十分なので補間はしない"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(runs=None):
+    """フェーズごとの p50 / p95 / p99 [秒] と回数"""
+    runs = recent_runs() if runs is None else runs
+    samples = {}
+    for run in runs:
+        samples.setdefault(f"({run.name})", []).append(run.seconds)
+        for name, seconds in run.phases.items():
+            samples.setdefault(name, []).append(seconds)
+    return {
+        name: {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+        for name, values in samples.items()
+    }
+
+
+# -------------------------
+# Prometheus 形式のメトリクス（こちらは常に有効。記録は数マイクロ秒）
+# -------------------------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [バケツごとの件数..., 合計, 件数]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 2)
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for labels, state in sorted(self._values.items()):
+                cumulative = 0
+                for upper, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (upper,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {state[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {state[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {state[-1]}")
+        return lines
+
+
+class GaugeFunc:
+    """取得（scrape）のたびに fn() を呼んで値を出すゲージ。
+    labels を付けたときは fn() が {ラベルの値の tuple: 値} を返す"""
+
+    def __init__(self, name, help_text, fn, labels=()):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.label_names = tuple(labels)
+        REGISTRY.append(self)
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            logger.exception("メトリクス %s の取得に失敗", self.name)
+            return []
+        values = value if self.label_names else {(): value}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, v in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {v}")
+        return lines
+
+
+REGISTRY = []
+
+OPERATIONS = Counter("kaji_operations_total", "DB操作の回数", ["op"])
+ERRORS = Counter("kaji_operation_errors_total", "失敗したDB操作の回数", ["op"])
+LATENCY = Histogram("kaji_operation_seconds", "DB操作にかかった時間", ["op"])
+SQLITE_BUSY = Counter("kaji_sqlite_busy_total",
+                      "SQLite の busy / locked（リトライ・エラー）の回数", ["kind"])
+BYTES_OUT = Counter("kaji_bytes_out_total", "画面・ダウンロードに渡したバイト数", ["kind"])
+LOCK_WAIT = Histogram("kaji_lock_wait_seconds",
+                      "書き込みロックを待った時間（thread: プロセス内 / sqlite: BEGIN IMMEDIATE）",
+                      ["kind"])
+
+
+def is_busy_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+@contextmanager
+def timed(op):
+    """op（insert / delete / list / export / aggregate など）の回数と時間を記録する"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        ERRORS.inc(op)
+        if is_busy_error(e):
+            SQLITE_BUSY.inc("error")
+        raise
+    finally:
+        LATENCY.observe(time.perf_counter() - started, op)
+        OPERATIONS.inc(op)
+
+
+def render_prometheus(registry=None):
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def register_db_gauges(files):
+    """家庭ごとの DB ファイルの大きさと行数のゲージを登録する（取得のたびに読む）。
+
+    files は {家庭ID: DBファイル} を返す関数（家庭は増えるので毎回呼ぶ）。
+    """
+    import sqlite3
+
+    def file_bytes():
+        return {
+            (household,): sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+            for household, path in files().items()
+        }
+
+    def row_count(path):
+        conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+        try:
+            # 論理削除の行は数えない（生きている行だけの部分インデックスで数えられる）
+            return conn.execute("SELECT COUNT(*) FROM kaji WHERE deleted_at IS NULL").fetchone()[0]
+        finally:
+            conn.close()
+
+    def row_counts():
+        counts = {}
+        for household, path in files().items():
+            try:
+                counts[(household,)] = row_count(path)
+            except sqlite3.Error:  # 作りかけ・マイグレーション前の DB は飛ばす
+                continue
+        return counts
+
+    # 同じ名前が二重に出ないよう、前に登録したものは外す
+    REGISTRY[:] = [m for m in REGISTRY if m.name not in ("kaji_db_file_bytes", "kaji_rows")]
+    GaugeFunc("kaji_db_file_bytes", "DBファイル（WAL込み）の大きさ", file_bytes, ["household"])
+    GaugeFunc("kaji_rows", "kaji テーブルの行数（削除済みを除く）", row_counts, ["household"])
+
+
+def start_exporter(port, host="127.0.0.1", files=None):
+    """/metrics を返す HTTP サーバーを別スレッドで立てて、サーバーを返す。
+    files（{家庭ID: DBファイル} を返す関数）を渡すと DB のゲージも出す"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    if files is not None:
+        register_db_gauges(files)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, name="kaji-metrics", daemon=True)
+    thread.start()
+    return server
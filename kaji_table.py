@@ -0,0 +1,41 @@
+"""スマホ向けの横スクロール・改行なしの表（HTML）。
+
+行ごとに文字列を += でつなぐと行数の2乗で遅くなるので、列ごとの配列から
+1回の join で組み立てる。セルの値は必ず HTML エスケープする。CSS と
+見出し行は列が同じなら使い回す。
+"""
+import html
+from functools import lru_cache
+
+TABLE_CSS = """<style>
+.table-wrap { overflow-x: auto; width: 100%; }
+.table-wrap table { border-collapse: collapse; width: 100%; min-width: 750px; }
+.table-wrap th, .table-wrap td { border: 1px solid #ccc; padding: 6px 10px; white-space: nowrap; }
+</style>"""
+
+# (列名, 見出し)
+COLUMNS = [
+    ("id", "ID"),
+    ("date", "日付"),
+    ("task", "家事"),
+    ("person", "担当"),
+    ("time", "時間"),
+    ("note", "メモ"),
+]
+
+
+@lru_cache(maxsize=8)
+def _head(headers):
+    cells = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    return f'{TABLE_CSS}\n<div class="table-wrap">\n<table>\n<tr>{cells}</tr>\n'
+
+
+def render_table(df, columns=COLUMNS):
+    """df（表示するページ分だけ）を HTML の表にする（削除は編集モードの表で行う）"""
+    names = [name for name, _ in columns]
+    head = _head(tuple(h for _, h in columns))
+
+    # 列ごとにまとめてエスケープしてから行に組む（iterrows は使わない）
+    cells = [[f"<td>{html.escape(str(v))}</td>" for v in df[name].tolist()] for name in names]
+    body = "\n".join(f"<tr>{''.join(row)}</tr>" for row in zip(*cells))
+    return f"{head}{body}\n</table></div>"
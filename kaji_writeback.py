@@ -0,0 +1,189 @@
+"""登録の書き込みを後回しにしてまとめてコミットするキュー（write-behind）。
+
+登録ボタンでは submit() でキューに積むだけにして、裏のスレッドが
+max_batch 件たまるか max_delay 秒たったところで repo.insert_many で
+まとめて1回コミットする。まだコミットされていない行は pending_rows() で
+読めるので、一覧にすぐ出せる（自分の書き込みが見える）。
+
+やり直しても入らなかった行は捨てずに failed_rows() に残す（画面は
+「登録しやした」と言ったあとなので、黙って消すと記録がなくなる）。
+retry_failed() で積み直すか、discard_failed() であきらめる。
+
+プロセス終了時には atexit で残りを書き切る。
+"""
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger("kaji.writeback")
+
+MAX_BATCH = 100
+MAX_DELAY = 0.5  # 秒
+RETRIES = 3
+
+
+class PendingWrite:
+    """キューに積んだ1件。コミットされると id が入り done() が True になる"""
+
+    def __init__(self, row):
+        self.row = row  # (date, task, person, minutes, note)
+        self.id = None
+        self.error = None
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.id
+
+    def _finish(self, new_id=None, error=None):
+        self.id = new_id
+        self.error = error
+        self._done.set()
+
+
+class WriteBehindQueue:
+    def __init__(self, repo, max_batch=MAX_BATCH, max_delay=MAX_DELAY, retries=RETRIES):
+        self.repo = repo
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retries = retries
+        self._pending = []
+        self._failed = []
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._flushing = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="kaji-writeback", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, date, task, person, minutes, note=""):
+        write = PendingWrite((date, task, person, int(minutes), note))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("キューは閉じられています")
+            self._pending.append(write)
+            self._cond.notify_all()
+        return write
+
+    def pending_rows(self):
+        """まだコミットされていない行（新しい順）"""
+        with self._cond:
+            return [w.row for w in reversed(self._pending) if not w.done()]
+
+    def failed_rows(self):
+        """やり直しても保存できなかった行と、そのエラー（古い順）"""
+        with self._cond:
+            return [(w.row, w.error) for w in self._failed]
+
+    def retry_failed(self):
+        """保存できなかった行をキューに積み直す。積んだ件数を返す"""
+        with self._cond:
+            failed, self._failed = self._failed, []
+        for write in failed:
+            self.submit(*write.row)
+        return len(failed)
+
+    def take_failed(self):
+        """保存できなかった行を取り出す（閉じる家庭から次に開く家庭へ引き継ぐ用）"""
+        with self._cond:
+            failed, self._failed = self._failed, []
+        return failed
+
+    def adopt_failed(self, writes):
+        """take_failed() で取り出した行を、このキューの保存できなかった行に戻す"""
+        with self._cond:
+            self._failed[:0] = writes
+
+    def discard_failed(self):
+        with self._cond:
+            discarded, self._failed = len(self._failed), []
+        return discarded
+
+    def flush(self, timeout=None):
+        """今キューにある分がコミットされるまで待つ。間に合えば True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._flushing -= 1
+        return True
+
+    def close(self, timeout=30):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # 最初の1件から max_delay 待つ（閉じるときや flush 中は待たない）
+            deadline = time.monotonic() + self.max_delay
+            while (len(self._pending) < self.max_batch
+                   and not self._closed and not self._flushing):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            self._inflight = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+            with self._cond:
+                del self._pending[:len(batch)]
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def _commit(self, batch):
+        for attempt in range(1, self.retries + 1):
+            try:
+                ids = self.repo.insert_many([w.row for w in batch])
+            except Exception as e:
+                logger.warning("まとめて登録に失敗（%d件, %d回目）: %s", len(batch), attempt, e)
+                if attempt == self.retries:
+                    self._commit_each(batch)
+                    return
+                time.sleep(0.1 * 2 ** attempt)
+            else:
+                for write, new_id in zip(batch, ids):
+                    write._finish(new_id)
+                return
+
+    def _commit_each(self, batch):
+        """まとめて入らなかったときは1件ずつ入れて、入らない行だけを残す"""
+        for write in batch:
+            try:
+                new_id = self.repo.insert_many([write.row])[0]
+            except Exception as e:
+                logger.error("登録できませんでした %r: %s", write.row, e)
+                with self._cond:
+                    self._failed.append(write)
+                write._finish(error=e)
+            else:
+                write._finish(new_id)